@@ -0,0 +1,364 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Benchmark (benchmark.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This script is part of the Data Miner package. It times the main function
+# of each of the other scripts so it can be seen if a change made them faster
+# or slower. First it makes a tree of files to work on. The tree is made
+# from a seed, so the same settings always give the same tree, and it is
+# only made again when the settings change. The settings are:
+#
+#   files       - How many files there are.
+#   sizes       - How big they are, one of fixed:n, uniform:min:max or
+#                 lognormal:median:sigma, all in bytes.
+#   dup_ratio   - The part of the files that are copies of another one.
+#   ext_mix     - The extensions and how often each comes up, for example
+#                 jpg:4,txt:2,:1 where the last means no extension.
+#   depth       - How deep the folders go.
+#   fanout      - How many folders there are in each folder.
+#
+# Each tool is then run against the tree a number of times, each time in a
+# new process so that its memory use can be measured. These are run in this
+# order, as compare needs the check sums sumUp leaves:
+#
+#   remover     - removeDups in test mode.
+#   sorter      - fileSorter copying to a new folder.
+#   dig         - dataMiner copying everything to a new folder.
+#   sumUp       - checkSumGetter on every folder in the tree.
+#   compare     - compareSums on every folder in the tree.
+#
+# For the fastest run of each the files and MB per second, the number of
+# read and write system calls (from /proc/self/io, so Linux only), the peak
+# memory use and CPU times are written out as JSON. The page cache is not
+# dropped so these are warm cache numbers. A JSON file from an earlier run
+# can be given as a baseline to see how much each time has changed.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sys, json, math, time, random, shutil, argparse, platform, tempfile, subprocess
+try :
+    import resource
+except ImportError :
+    resource = None
+
+# Set some global vars here
+scriptName      = 'Benchmark'
+scriptVersion   = '0.01'
+
+benchTools      = ['remover', 'sorter', 'dig', 'sumUp', 'compare']
+defaultWorkDir  = os.path.join(tempfile.gettempdir(), 'dataMiner_bench')
+# The random data files are cut from
+poolSize        = 4194304
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def parseSizes (spec) :
+    '''Turn a size spec into a function that takes a random.Random and
+    gives back a file size.'''
+
+    parts = spec.split(':')
+    try :
+        if parts[0] == 'fixed' and len(parts) == 2 :
+            size = int(parts[1])
+            return lambda rng : size
+        if parts[0] == 'uniform' and len(parts) == 3 :
+            low, high = int(parts[1]), int(parts[2])
+            return lambda rng : rng.randint(low, high)
+        if parts[0] == 'lognormal' and len(parts) == 3 :
+            median, sigma = float(parts[1]), float(parts[2])
+            return lambda rng : int(median * math.exp(sigma * rng.gauss(0, 1)))
+    except ValueError :
+        pass
+    raise ValueError('Bad size spec: ' + spec)
+
+
+def parseMix (spec) :
+    '''Turn an extension mix like jpg:4,txt:2,:1 into a list to pick from.'''
+
+    mix = []
+    for part in spec.split(',') :
+        ext, sep, weight = part.partition(':')
+        try :
+            mix.extend([ext.strip('.')] * int(weight or 1))
+        except ValueError :
+            raise ValueError('Bad extension weight: ' + part)
+    return mix
+
+
+def fileData (pool, index, offset, size) :
+    '''The bytes of a file, they start with its index so no two are the
+    same unless they are meant to be.'''
+
+    data = ('%016d' % index)[:size]
+    while len(data) < size :
+        data += pool[offset:offset + size - len(data)]
+        offset = 0
+    return data
+
+
+def makeTree (workDir, files=10000, sizes='lognormal:32768:1.5', dupRatio=0.1, extMix='jpg:4,png:2,txt:2,pdf:1,:1', depth=3, fanout=4, seed=1) :
+    '''Make the tree of files to run the tools on in workDir/tree, unless
+    one made with the same settings is already there. Returns a dict of the
+    settings with the number of files, folders and bytes in the tree.'''
+
+    settings = {'files' : files, 'sizes' : sizes, 'dupRatio' : dupRatio, 'extMix' : extMix,
+        'depth' : depth, 'fanout' : fanout, 'seed' : seed}
+    treeDir = os.path.join(workDir, 'tree')
+    stampFile = os.path.join(workDir, 'tree.json')
+    if os.path.isfile(stampFile) and os.path.isdir(treeDir) :
+        with open(stampFile) as f :
+            stamp = json.load(f)
+        if stamp['settings'] == settings :
+            return stamp
+    if os.path.isdir(treeDir) :
+        shutil.rmtree(treeDir)
+
+    rng = random.Random(seed)
+    sizeOf = parseSizes(sizes)
+    mix = parseMix(extMix)
+    pool = ''.join(chr(rng.randint(0, 255)) for i in xrange(65536)) * (poolSize // 65536)
+
+    # The folders, the top one and fanout under each down to depth
+    dirs = [treeDir]
+    level = [treeDir]
+    for d in range(depth) :
+        level = [os.path.join(parent, 'd' + str(i).zfill(2)) for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for folder in dirs :
+        os.makedirs(folder)
+
+    originals = []
+    totalBytes = 0
+    for index in xrange(files) :
+        if originals and rng.random() < dupRatio :
+            origin, offset, size = rng.choice(originals)
+        else :
+            origin, offset, size = index, rng.randrange(poolSize), max(0, sizeOf(rng))
+            originals.append((origin, offset, size))
+        ext = rng.choice(mix)
+        name = 'f' + str(index).zfill(7) + ('.' + ext if ext else '')
+        with open(os.path.join(rng.choice(dirs), name), 'wb') as f :
+            f.write(fileData(pool, origin, offset, size))
+        totalBytes += size
+
+    stamp = {'settings' : settings, 'files' : files, 'dirs' : len(dirs), 'bytes' : totalBytes}
+    with open(stampFile, 'w') as f :
+        json.dump(stamp, f, sort_keys=True)
+    return stamp
+
+
+def treeDirs (treeDir) :
+    '''All the folders in the tree, top first.'''
+
+    return [d for d, subDirs, names in os.walk(treeDir)]
+
+
+def ioCounts () :
+    '''The read and write system calls made by this process so far, or None
+    where that can't be found.'''
+
+    try :
+        with open('/proc/self/io') as f :
+            counts = dict(line.split(':') for line in f if ':' in line)
+        return int(counts['syscr']), int(counts['syscw'])
+    except (IOError, KeyError, ValueError) :
+        return None, None
+
+
+def loadTool (tool, treeDir, targetDir, jobs) :
+    '''Import one tool and return a function that runs it on the tree,
+    this is called in the child process.'''
+
+    if tool == 'remover' :
+        from removeDups import remover
+        return lambda : remover(treeDir, 'test')
+    if tool == 'sorter' :
+        from fileSorter import sorter
+        return lambda : sorter(treeDir, targetDir, 'copy', 100)
+    if tool == 'dig' :
+        from dataMiner import dig
+        return lambda : dig(treeDir, targetDir, None, fileSize=0, targetDirs=100, mode='copy', jobs=jobs, fileFilter='size:>=0')
+    if tool == 'sumUp' :
+        from checkSumGetter import sumUp
+        return lambda : [sumUp(folder, jobs) for folder in treeDirs(treeDir)]
+    if tool == 'compare' :
+        from compareSums import compare
+        return lambda : [compare(folder, jobs) for folder in treeDirs(treeDir)]
+
+
+def child (tool, treeDir, targetDir, jobs, resultFile) :
+    '''Time one run of a tool and write what was measured to resultFile.
+    Anything the tool prints is thrown away.'''
+
+    devNull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devNull, 1)
+    run = loadTool(tool, treeDir, targetDir, jobs)
+    reads, writes = ioCounts()
+    cpu = os.times()
+    start = time.time()
+    run()
+    seconds = time.time() - start
+    cpuEnd = os.times()
+    readsEnd, writesEnd = ioCounts()
+    result = {
+        'seconds' : seconds,
+        'userSeconds' : cpuEnd[0] - cpu[0],
+        'systemSeconds' : cpuEnd[1] - cpu[1],
+        'readCalls' : readsEnd - reads if reads is not None else None,
+        'writeCalls' : writesEnd - writes if writes is not None else None,
+        'peakRssKb' : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+    }
+    with open(resultFile, 'w') as f :
+        json.dump(result, f)
+
+
+def bench (workDir, tools=benchTools, repeat=3, jobs=4, **treeSettings) :
+    '''Make the tree and run each tool on it repeat times. Returns a dict
+    that can be written out as JSON.'''
+
+    tree = makeTree(workDir, **treeSettings)
+    treeDir = os.path.join(workDir, 'tree')
+    results = {}
+    try :
+        for tool in [t for t in benchTools if t in tools] :
+            runs = []
+            for i in range(repeat) :
+                targetDir = os.path.join(workDir, 'target')
+                if os.path.isdir(targetDir) :
+                    shutil.rmtree(targetDir)
+                os.mkdir(targetDir)
+                resultFile = os.path.join(workDir, 'result.json')
+                subprocess.check_call([sys.executable, os.path.abspath(__file__), '--child', tool, '-w', workDir,
+                    '-j', str(jobs), '--result', resultFile], cwd=os.path.dirname(os.path.abspath(__file__)))
+                with open(resultFile) as f :
+                    runs.append(json.load(f))
+            best = min(runs, key=lambda r : r['seconds'])
+            best['runs'] = [r['seconds'] for r in runs]
+            seconds = best['seconds'] or 1e-9
+            best['filesPerSecond'] = tree['files'] / seconds
+            best['mbPerSecond'] = tree['bytes'] / 1048576.0 / seconds
+            results[tool] = best
+    finally :
+        # Take out what the tools left behind
+        if os.path.isdir(os.path.join(workDir, 'target')) :
+            shutil.rmtree(os.path.join(workDir, 'target'))
+        for folder in treeDirs(treeDir) :
+            for name in ['checkSum.txt', 'checkSum.bin'] :
+                if os.path.isfile(os.path.join(folder, name)) :
+                    os.remove(os.path.join(folder, name))
+
+    return {
+        'version' : scriptVersion,
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'jobs' : jobs,
+        'repeat' : repeat,
+        'time' : time.strftime('%Y-%m-%d %H:%M:%S'),
+        'tree' : tree,
+        'results' : results,
+    }
+
+
+def compareRuns (report, baseline) :
+    '''Add the change in time from a baseline report to each result, as a
+    fraction. Below 0 is faster.'''
+
+    for tool, result in report['results'].iteritems() :
+        before = baseline.get('results', {}).get(tool)
+        if before and before.get('seconds') :
+            result['change'] = result['seconds'] / before['seconds'] - 1
+    if baseline.get('tree', {}).get('settings') != report['tree']['settings'] :
+        report['baselineWarning'] = 'The baseline was run on a different tree'
+    return report
+
+
+###############################################################################
+############################# Command Process ###############################
+###############################################################################
+
+# The argument handler
+def userArguments (args) :
+    '''Process incoming command arguments.'''
+
+    if args.child :
+        child(args.child, os.path.join(args.work_dir, 'tree'), os.path.join(args.work_dir, 'target'), args.jobs, args.result)
+        return
+
+    tools = args.tools.split(',') if args.tools else benchTools
+    for tool in tools :
+        if tool not in benchTools :
+            sys.exit('\nERROR: Unknown tool <' + tool + '>, it should be one of: ' + ', '.join(benchTools))
+    try :
+        parseSizes(args.sizes)
+        parseMix(args.ext_mix)
+    except ValueError as e :
+        sys.exit('\nERROR: ' + str(e))
+    if not os.path.isdir(args.work_dir) :
+        os.makedirs(args.work_dir)
+
+    report = bench(args.work_dir, tools, args.repeat, args.jobs, files=args.files, sizes=args.sizes,
+        dupRatio=args.dup_ratio, extMix=args.ext_mix, depth=args.depth, fanout=args.fanout, seed=args.seed)
+    if args.baseline :
+        with open(args.baseline) as f :
+            compareRuns(report, json.load(f))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output :
+        with open(args.output, 'w') as f :
+            f.write(output + '\n')
+    else :
+        print output
+
+
+###############################################################################
+############################# Script Starts Here ##############################
+###############################################################################
+
+if __name__ == '__main__' :
+
+    # Available choices
+    parser = argparse.ArgumentParser(description=scriptName)
+    parser.add_argument('-w', '--work_dir', default=defaultWorkDir, help='The folder the tree is made in and the tools write to. The default is ' + defaultWorkDir + '.')
+    parser.add_argument('-t', '--tools', help='The tools to run, separated by commas. The default is all of them: ' + ','.join(benchTools) + '. Compare needs sumUp to be run too.')
+    parser.add_argument('-n', '--files', type=int, default=10000, help='The number of files in the tree. The default is 10000.')
+    parser.add_argument('-z', '--sizes', default='lognormal:32768:1.5', help='The sizes of the files, fixed:n, uniform:min:max or lognormal:median:sigma in bytes. The default is lognormal:32768:1.5.')
+    parser.add_argument('-d', '--dup_ratio', type=float, default=0.1, help='The part of the files that are copies of another. The default is 0.1.')
+    parser.add_argument('-e', '--ext_mix', default='jpg:4,png:2,txt:2,pdf:1,:1', help='The extensions of the files and how often each comes up. The default is jpg:4,png:2,txt:2,pdf:1,:1 where the last is no extension.')
+    parser.add_argument('--depth', type=int, default=3, help='How deep the folders in the tree go. The default is 3.')
+    parser.add_argument('--fanout', type=int, default=4, help='How many folders are in each folder. The default is 4.')
+    parser.add_argument('--seed', type=int, default=1, help='The seed the tree is made from. The default is 1.')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='How many times each tool is run, the fastest is reported. The default is 3.')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='The number of jobs given to the tools that take it. The default is 4.')
+    parser.add_argument('-o', '--output', help='A file to write the JSON report to rather than the screen.')
+    parser.add_argument('-b', '--baseline', help='A JSON report from an earlier run to compare the times with.')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+
+    # Send the collected arguments to the handler
+    userArguments(parser.parse_args())
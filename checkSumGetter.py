@@ -33,6 +33,13 @@
 import codecs, shutil, os, sys, argparse, timeit, hashlib
 from datetime import datetime
 from datetime import timedelta
+from hashEngine import mdfiveSum, sumFiles, digestFunc, hashAlgorithms
+from hashCache import HashCache, defaultCacheFile, statKey
+from treeWalker import scanDir
+from logWriter import LogWriter, logFormats
+from manifestIndex import writeIndex
+from ioScheduler import schedule, ioOrders
+from profiler import Profile, phase
 
 # Set some global vars here
 scriptName      = 'Check Sum Getter'
@@ -54,16 +61,6 @@ print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion
 # Define functions
 
 
-def mdfiveSum (fname) :
-    '''Get an md5 sum on a file.'''
-
-    hash_md5 = hashlib.md5()
-    with open(fname, "rb") as f :
-        for chunk in iter(lambda: f.read(4096), b"") :
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
-
-
 def wordWrap (text, width) :
     '''A word-wrap function that preserves existing line breaks
         and most spaces in the text. Expects that existing line
@@ -91,42 +88,64 @@ def terminal (msg) :
     print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
 
 
-def writeToLog (msg, log) :
-    '''Write to the session log file.'''
-
-    try :
-        # Because we want to read errors from top to bottom, we don't pre append
-        # them to the error log file.
-        if not os.path.isfile(log) :
-            writeObject = codecs.open(log, "w", encoding='utf_8')
-        else :
-            writeObject = codecs.open(log, "a", encoding='utf_8')
-
-        # Write and close
-        writeObject.write(msg + '\n')
-        writeObject.close()
-    except :
-        terminal('Error writing this event to error log: ' + msg)
-
-    return
-
-
-def sumUp (targetPath) :
+def sumUp (targetPath, jobs=None, processes=False, cache=None, logFormat='text', ioOrder='walk', algorithm='md5', chunkSize=None, mapSize=None) :
     '''This is the main function which will go into a folder and get the
-    sum of all the files there. It is not recursive.'''
-
-    # Create log file
+    sum of all the files there. It is not recursive. The files are hashed
+    by a pool of jobs workers but are always logged in name order. The
+    size and modification time (in nanoseconds) of each file are logged
+    with its sum so that compareSums can tell if it has been touched.
+    The files can be read in a different ioOrder (see ioScheduler.py), the
+    sums are then held until they can be logged in name order.
+
+    The sums can be taken with any of the hashAlgorithms in hashEngine.py,
+    reading chunkSize bytes at a time or from a memory map for files of
+    mapSize or more. The name of the algorithm is the name of the field the
+    sums are logged under.'''
+
+    # Create log file, this also replaces any old one in either format
     logFile = os.path.join(targetPath, 'checkSum.txt')
-    if os.path.isfile(logFile) :
-        os.remove(logFile)
+    indexFile = os.path.join(targetPath, 'checkSum.bin')
+    for oldFile in [logFile, indexFile] :
+        if os.path.isfile(oldFile) :
+            os.remove(oldFile)
 
     terminal('\n\nProcessing files, please wait as this might take a while.')
 
-    files = [f for f in os.listdir(targetPath) if os.path.isfile(os.path.join(targetPath, f))]
+    # Stat the files before they are read so a change while one is being
+    # hashed will show up next time
+    stats = {}
+    for entry in scanDir(targetPath) :
+        try :
+            with phase('stat') :
+                if entry.is_file() :
+                    stats[entry.path] = statKey(entry.stat())
+        except OSError :
+            pass
+    files = sorted(stats.keys())
+    if logFormat == 'binary' :
+        records = []
+    else :
+        log = LogWriter(logFile, ['name', algorithm, 'size', 'mtime'], logFormat)
+
+    results = sumFiles(schedule(files, ioOrder), jobs, processes, digestFunc(algorithm, chunkSize, mapSize), cache=cache, algorithm=algorithm)
+    if ioOrder != 'walk' :
+        sums = dict(results)
+        results = ((source, sums[source]) for source in files)
+
+    for source, digest in results :
+        if digest is None :
+            terminal('Could not read file: ' + source)
+            continue
+        dev, ino, size, mtime = stats[source]
+        if logFormat == 'binary' :
+            records.append((os.path.basename(source), digest, size, mtime))
+        else :
+            log.write(os.path.basename(source), digest, size, mtime)
 
-    for f in files :
-        md5 = mdfiveSum(os.path.join(targetPath, f))
-        writeToLog(f + ', ' + md5, logFile)
+    if logFormat == 'binary' :
+        writeIndex(indexFile, records, algorithm)
+    else :
+        log.close()
 
     terminal('\n\nTotal files: ' + str(len(files)))
 
@@ -151,8 +170,27 @@ def userArguments (args) :
     else :
         sys.exit('\nERROR: No target path was specified')
 
+    # Number of files to hash at once, the default is one per CPU
+    jobs = args.jobs
+
+    # Sums can be kept in a cache between runs
+    cache = None
+    if args.cache :
+        cache = HashCache(args.cache, args.cache_size)
+
+    # Time each phase of the work if asked, cProfile stats go to a file
+    profile = None
+    if args.profile :
+        profile = Profile(None if args.profile is True else args.profile).start()
+
     # With all our paramters in place we can call the main function
-    sumUp(targetPath)
+    sumUp(targetPath, jobs, args.processes, cache, args.format, args.io_order, args.algorithm, args.chunk_size, args.mmap_size)
+
+    if profile :
+        print '\n' + profile.stop().report()
+
+    if cache :
+        cache.close()
 
 
 ###############################################################################
@@ -171,6 +209,16 @@ if __name__ == '__main__' :
     # Available choices
     parser = argparse.ArgumentParser()
     parser.add_argument('-t', '--target_path', help='The path to where the data that is mined will go.')
+    parser.add_argument('-j', '--jobs', type=int, help='The number of files to hash at the same time. The default is one for each CPU.')
+    parser.add_argument('-p', '--processes', action='store_true', help='This switch will hash with a pool of processes rather than threads.')
+    parser.add_argument('-o', '--format', choices=logFormats + ['binary'], default='text', help='The format of the checkSum.txt file. The default is text, the original "name, sum" lines. Use csv or jsonl if file names may have commas or new lines in them. Binary writes an indexed checkSum.bin file instead.')
+    parser.add_argument('-c', '--cache', nargs='?', const=defaultCacheFile, help='This switch will keep sums in a cache file so unchanged files are not read again on the next run. A cache file path can be given, the default is ' + defaultCacheFile + '.')
+    parser.add_argument('--cache_size', type=int, help='The most entries to keep in the cache file. The least recently used are dropped first. The default is no limit.')
+    parser.add_argument('--profile', nargs='?', const=True, help='This switch will report the time taken by each phase of the work, such as listing folders, hashing and copying, with rates and times per file. If a file is given, cProfile stats are written to it too.')
+    parser.add_argument('-a', '--algorithm', choices=sorted(hashAlgorithms), default='md5', help='The hash to take the sums with, one of ' + ', '.join(sorted(hashAlgorithms)) + '. The default is md5. Zlib64 and xxh64 are much faster but only good for finding changes, not tampering.')
+    parser.add_argument('--chunk_size', type=int, help='How many bytes of a file are read at a time when hashing. The default is 1048576.')
+    parser.add_argument('--mmap_size', type=int, help='Files this many bytes or bigger are memory mapped rather than read when hashing, which saves copying them. Use 0 to always read them. The default is 67108864 (64MB).')
+    parser.add_argument('--io_order', choices=ioOrders, default='walk', help='The order files are read in. Walk is name order, inode sorts them by inode number and physical by where they are on the disk. The last two are much faster on spinning disks. The sums are still written in name order. The default is walk.')
 
     # Send the collected arguments to the handler
     userArguments(parser.parse_args())
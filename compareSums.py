@@ -30,9 +30,13 @@
 ###############################################################################
 
 # Import all needed Python libs
-import codecs, shutil, os, sys, argparse, timeit, hashlib
+import codecs, shutil, os, sys, argparse, timeit, hashlib, random
 from datetime import datetime
 from datetime import timedelta
+from hashEngine import mdfiveSum, sumFiles, digestFunc, hashAlgorithms
+from hashCache import HashCache, defaultCacheFile, statKey
+from manifestIndex import readManifest, manifestAlgorithm
+from profiler import Profile, phase
 
 # Set some global vars here
 scriptName      = 'Compare Sums'
@@ -54,16 +58,6 @@ print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion
 # Define functions
 
 
-def mdfiveSum (fname) :
-    '''Get an md5 sum on a file.'''
-
-    hash_md5 = hashlib.md5()
-    with open(fname, "rb") as f :
-        for chunk in iter(lambda: f.read(4096), b"") :
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
-
-
 def wordWrap (text, width) :
     '''A word-wrap function that preserves existing line breaks
         and most spaces in the text. Expects that existing line
@@ -91,56 +85,69 @@ def terminal (msg) :
     print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
 
 
-def writeToLog (msg, log) :
-    '''Write to the session log file.'''
-
-    try :
-        # Because we want to read errors from top to bottom, we don't pre append
-        # them to the error log file.
-        if not os.path.isfile(log) :
-            writeObject = codecs.open(log, "w", encoding='utf_8')
-        else :
-            writeObject = codecs.open(log, "a", encoding='utf_8')
-
-        # Write and close
-        writeObject.write(msg + '\n')
-        writeObject.close()
-    except :
-        terminal('Error writing this event to error log: ' + msg)
-
-    return
+def compare (targetPath, jobs=None, processes=False, cache=None, fast=False, sample=0, chunkSize=None, mapSize=None) :
+    '''This is the main function which will go into a folder and look
+    for a checkSum.bin or checkSum.txt file, then read it and compare the sums listed
+    for each of the files found in the folder. The files are hashed by a
+    pool of jobs workers and reported in the order they are listed.
 
+    In fast mode a file whose size and modification time are the same as
+    when it was summed is taken to be unchanged and is not read, except for
+    a random sample fraction of them which are still checked. Files listed
+    without a size and time are always checked.
 
-def compare (targetPath) :
-    '''This is the main function which will go into a folder and look
-    for a checkSum.txt file, then read it and compare the sums listed
-    for each of the files found in the folder.'''
+    The files are hashed with the same algorithm the check sum file was
+    made with, reading chunkSize bytes at a time or from a memory map for
+    files of mapSize or more.'''
 
-    # Find log file
-    logFile = os.path.join(targetPath, 'checkSum.txt')
+    # Find log file, a binary one is used over a text one
+    logFile = os.path.join(targetPath, 'checkSum.bin')
+    if not os.path.isfile(logFile) :
+        logFile = os.path.join(targetPath, 'checkSum.txt')
     # Bail out now if we can't find the checkSum file
     if not os.path.isfile(logFile) :
         sys.exit('\nERROR: Log file: ' + logFile + ' not found!')
 
     fileCount = 0
     total = 0
+    unchanged = 0
     terminal('\n\nProcessing files, please wait as this might take a while.')
 
-    # Process files listed in the log file
-    with codecs.open(logFile, 'rt', 'utf_8_sig') as contents :
-        for line in contents :
-            total +=1
-            target = os.path.join(targetPath, line.split(', ')[0])
-            targetSum = mdfiveSum(target)
-            listSum = line.split(', ')[1].strip()
-            if not os.path.isfile(target) :
+    # Collect the files listed in the log file, whatever format it is in
+    listSums = []
+    for name, listSum, size, mtime in readManifest(logFile) :
+        total +=1
+        target = os.path.join(targetPath, name)
+        if fast and size not in (None, '') and mtime not in (None, '') :
+            try :
+                with phase('stat') :
+                    dev, ino, curSize, curTime = statKey(os.stat(target))
+            except OSError :
                 terminal('File not found: ' + target)
-            if not str(targetSum) == str(listSum) :
-                terminal('File not the same: ' + target)
-            else :
+                continue
+            if curSize == int(size) and curTime == int(mtime) and random.random() >= sample :
+                unchanged +=1
                 fileCount +=1
+                continue
+        listSums.append((target, listSum))
+
+    # Hash them all and check each one against its listed sum
+    algorithm = manifestAlgorithm(logFile)
+    if algorithm not in hashAlgorithms :
+        sys.exit('\nERROR: The ' + algorithm + ' hash the check sums were made with is not installed')
+    targets = [target for target, listSum in listSums]
+    for i, (target, targetSum) in enumerate(sumFiles(targets, jobs, processes, digestFunc(algorithm, chunkSize, mapSize), cache=cache, algorithm=algorithm)) :
+        listSum = listSums[i][1]
+        if targetSum is None :
+            terminal('File not found: ' + target)
+        elif not str(targetSum) == str(listSum) :
+            terminal('File not the same: ' + target)
+        else :
+            fileCount +=1
 
     terminal('\n\nMatched ' + str(fileCount) + ' of ' + str(total) + ' files')
+    if fast :
+        terminal('Unchanged files not read: ' + str(unchanged))
 
     return
 
@@ -163,8 +170,33 @@ def userArguments (args) :
     else :
         sys.exit('\nERROR: No target path was specified')
 
+    # Number of files to hash at once, the default is one per CPU
+    jobs = args.jobs
+
+    # Sums can be kept in a cache between runs
+    cache = None
+    if args.cache :
+        cache = HashCache(args.cache, args.cache_size)
+
     # With all our paramters in place we can call the main function
-    compare(targetPath)
+    # A sample only makes sense in fast mode so it turns that on too
+    if args.sample is not None and not 0 <= args.sample <= 1 :
+        sys.exit('\nERROR: Sample must be a fraction between 0 and 1')
+    fast = args.fast or args.sample is not None
+    sample = args.sample or 0
+
+    # Time each phase of the work if asked, cProfile stats go to a file
+    profile = None
+    if args.profile :
+        profile = Profile(None if args.profile is True else args.profile).start()
+
+    compare(targetPath, jobs, args.processes, cache, fast, sample, args.chunk_size, args.mmap_size)
+
+    if profile :
+        print '\n' + profile.stop().report()
+
+    if cache :
+        cache.close()
 
 
 ###############################################################################
@@ -183,6 +215,15 @@ if __name__ == '__main__' :
     # Available choices
     parser = argparse.ArgumentParser()
     parser.add_argument('-t', '--target_path', help='The path to where the data that is mined will go.')
+    parser.add_argument('-j', '--jobs', type=int, help='The number of files to hash at the same time. The default is one for each CPU.')
+    parser.add_argument('-p', '--processes', action='store_true', help='This switch will hash with a pool of processes rather than threads.')
+    parser.add_argument('-f', '--fast', action='store_true', help='This switch will only read files whose size or modification time has changed since their sums were taken.')
+    parser.add_argument('-s', '--sample', type=float, help='In fast mode, also check this fraction (0 to 1) of the unchanged files, picked at random. Using this turns on fast mode.')
+    parser.add_argument('-c', '--cache', nargs='?', const=defaultCacheFile, help='This switch will take the sums of unchanged files from the cache file rather than reading them. Note that this will not catch a file that has changed without its size or time changing. A cache file path can be given, the default is ' + defaultCacheFile + '.')
+    parser.add_argument('--chunk_size', type=int, help='How many bytes of a file are read at a time when hashing. The default is 1048576.')
+    parser.add_argument('--mmap_size', type=int, help='Files this many bytes or bigger are memory mapped rather than read when hashing, which saves copying them. Use 0 to always read them. The default is 67108864 (64MB).')
+    parser.add_argument('--profile', nargs='?', const=True, help='This switch will report the time taken by each phase of the work, such as listing folders, hashing and copying, with rates and times per file. If a file is given, cProfile stats are written to it too.')
+    parser.add_argument('--cache_size', type=int, help='The most entries to keep in the cache file. The least recently used are dropped first. The default is no limit.')
 
     # Send the collected arguments to the handler
     userArguments(parser.parse_args())
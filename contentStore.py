@@ -0,0 +1,238 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Content Store (contentStore.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. Recovered data is full of
+# the same files under different names. Rather than copying each one into
+# its target folder, dataMiner can keep the data of each file once in a
+# store, filed by its sum, and hard link it into the target folders. The
+# store is laid out as:
+#
+#   dataMiner_store/ab/cd/abcd...   - The data, by the first two pairs of
+#                                     digits of its sum and then the sum.
+#
+# A file is hashed before it is copied or moved, so a file whose data is
+# already in the store is not written at all, it only gets a new link. Before
+# anything is taken as a duplicate it is compared with the stored data byte
+# for byte, as the fast hashes could give two files the same sum.
+#
+# A name that is already taken in a target folder by a file with different
+# data is given the start of the sum on the end of its name rather than
+# replacing it. On a file system without hard links (FAT for one) the data
+# is copied from the store instead.
+#
+# As the links all share the same data, a file changed in place in one
+# target folder changes in all of them and in the store.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, errno, shutil, filecmp, tempfile, threading
+from copyEngine import copyFile, copyAndHash
+from hashEngine import fileDigest, newHash
+from transferPlan import makeDirs
+from profiler import phase
+
+# The folder the store is kept in, under the target
+storeName       = 'dataMiner_store'
+# Errors from os.link() that mean a copy has to be made instead
+noLinkErrors    = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOSYS)
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def blobPath (storePath, digest) :
+    '''Where the data with this sum is kept in a store.'''
+
+    return os.path.join(storePath, digest[:2], digest[2:4], digest)
+
+
+def sameBytes (first, second) :
+    '''True if two files hold the same data, byte for byte. Not all the
+    hashes can be trusted to tell files apart on their own.'''
+
+    return filecmp.cmp(first, second, shallow=False)
+
+
+def collisionName (target, digest, tries=0) :
+    '''The name a file is given when its own is taken by other data.'''
+
+    stem, ext = os.path.splitext(target)
+    return stem + '_' + digest[:8] + ('_' + str(tries) if tries else '') + ext
+
+
+class ContentStore (object) :
+    '''A store of file data filed by sum, see above. transfer() puts a file
+    in the store and links it to its target.'''
+
+    def __init__ (self, storePath, algorithm='md5', verify=False) :
+
+        self.storePath      = storePath
+        self.algorithm      = algorithm
+        self.verify         = verify
+        self.made           = set()
+        self.canLink        = True
+        # The sums being put in the store right now, so two threads with
+        # the same data don't both write it
+        self.busy           = set()
+        self.cond           = threading.Condition()
+        makeDirs(storePath)
+
+    def makeShard (self, blob) :
+        '''Make the folder a blob goes in if it isn't there.'''
+
+        folder = os.path.dirname(blob)
+        if folder not in self.made :
+            makeDirs(folder)
+            self.made.add(folder)
+
+    def putBlob (self, temp, blob) :
+        '''Put a temp file in place as a blob. Linking rather than renaming
+        leaves a blob another thread has just put there alone. Returns False
+        if there was one.'''
+
+        try :
+            os.link(temp, blob)
+            return True
+        except OSError as e :
+            if e.errno == errno.EEXIST :
+                return False
+            if e.errno not in noLinkErrors :
+                raise
+        if os.path.exists(blob) :
+            return False
+        os.rename(temp, blob)
+        return True
+
+    def put (self, source, mode) :
+        '''Put the data of a file in the store unless it is already there.
+        Return the strategy used, or "duplicate" if it was already there,
+        and the sum. The file is hashed first, without writing anything, so
+        a duplicate is not written at all and in move mode the source is
+        just removed. The data is compared with the blob first and an
+        IOError is raised if it is not the same.'''
+
+        digest = fileDigest(source, self.algorithm)
+        with self.cond :
+            while digest in self.busy :
+                self.cond.wait()
+            self.busy.add(digest)
+        try :
+            return self.putNew(source, mode, digest)
+        finally :
+            with self.cond :
+                self.busy.discard(digest)
+                self.cond.notify_all()
+
+    def putNew (self, source, mode, digest) :
+        '''The rest of put(), once no other thread is putting this sum.'''
+
+        blob = blobPath(self.storePath, digest)
+        if os.path.exists(blob) :
+            if not sameBytes(source, blob) :
+                raise IOError(errno.EEXIST, 'Other data with the same sum is already in the store', source)
+            if mode == 'move' :
+                os.remove(source)
+            return 'duplicate', digest
+
+        # The data goes to a temp file first so a blob is never seen half
+        # written
+        fd, temp = tempfile.mkstemp(prefix='.put_', dir=self.storePath)
+        os.close(fd)
+        try :
+            if mode == 'copy' :
+                # If the file changed after it was hashed it is filed by
+                # what was copied
+                strategy, digest = copyAndHash(source, temp, newHash(self.algorithm), self.verify)
+                blob = blobPath(self.storePath, digest)
+            else :
+                with phase('move') :
+                    shutil.move(source, temp)
+                strategy = mode
+            self.makeShard(blob)
+            if not self.putBlob(temp, blob) :
+                if not sameBytes(temp, blob) :
+                    if mode == 'move' :
+                        shutil.move(temp, source)
+                    raise IOError(errno.EEXIST, 'Other data with the same sum is already in the store', source)
+                strategy = 'duplicate'
+        finally :
+            if os.path.exists(temp) :
+                os.remove(temp)
+        return strategy, digest
+
+    def sameData (self, blob, target) :
+        '''True if a target already holds the data of a blob.'''
+
+        if os.path.samefile(blob, target) :
+            return True
+        return os.path.isfile(target) and sameBytes(blob, target)
+
+    def place (self, blob, target) :
+        '''Link, or copy, a blob to its target. Returns False if it is
+        already there.'''
+
+        if os.path.lexists(target) :
+            return False
+        if self.canLink :
+            try :
+                os.link(blob, target)
+                return True
+            except OSError as e :
+                if e.errno == errno.EEXIST :
+                    return False
+                if e.errno not in noLinkErrors :
+                    raise
+                if e.errno != errno.EMLINK :
+                    self.canLink = False
+        copyFile(blob, target)
+        return True
+
+    def link (self, digest, target) :
+        '''Put the blob with this sum at target. If the name is taken by
+        other data it is put under a new name. Returns the target used and
+        one of "linked", "renamed" or "same" if the same data was already
+        there under that name.'''
+
+        blob = blobPath(self.storePath, digest)
+        tries = 0
+        name = target
+        while not self.place(blob, name) :
+            if self.sameData(blob, name) :
+                return name, 'same'
+            name = collisionName(target, digest, tries)
+            tries +=1
+        return name, 'renamed' if tries else 'linked'
+
+    def transfer (self, source, target, mode) :
+        '''Put a file in the store and link it to target. Returns the
+        strategy used, the sum, the target used and how it was linked, see
+        put() and link().'''
+
+        strategy, digest = self.put(source, mode)
+        target, linked = self.link(digest, target)
+        return strategy, digest, target, linked
@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Copy Engine (copyEngine.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It copies a file the fastest
+# way the system will allow and says which way that was. In order it tries:
+#
+#   reflink         - When the source and target are on the same btrfs or XFS
+#                     file system the target can share the source's blocks
+#                     (FICLONE ioctl). Nothing is copied at all.
+#   copy_file_range - The kernel copies the data without it passing through
+#                     this program. Some file systems will do this server side.
+#   sendfile        - Much the same but works on older kernels.
+#   shutil          - The plain old read and write copy.
+#
+# If a way fails the next one is tried. Python 3.8 gives us copy_file_range()
+# and sendfile() in os, on older versions they are called from libc directly.
+#
+# copyAndHash() is for when a check sum of the file is wanted as well. The
+# kernel ways never let us see the data so it copies by reading into a buffer
+# which is hashed on the way through ('hashed'). A reflink is still tried
+# first as that needs no writing, then the source is read once for the sum.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, errno, shutil, hashlib, ctypes, ctypes.util
+from profiler import phase
+from hashEngine import hashRest, readBuffer, window
+try :
+    import fcntl
+except ImportError :
+    fcntl = None
+
+# The ioctl that makes a reflink, from linux/fs.h
+FICLONE         = 0x40049409
+# Most bytes to ask the kernel for in one call
+maxChunk        = 1 << 30
+# The errors that mean this way of copying won't work here
+fallBackErrors  = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                    errno.ENOTTY, errno.EBADF, errno.EPERM, errno.ENOTSUP)
+# Devices we already know can't do a reflink
+noReflink       = set()
+
+# The order copy strategies are tried in
+strategies      = ['reflink', 'copy_file_range', 'sendfile', 'shutil', 'hashed']
+# How much to read at a time when hashing
+hashChunk       = 1048576
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def libcCall (name, *argtypes) :
+    '''Return a function from libc that raises OSError like the os module
+    does, or None if this libc doesn't have it.'''
+
+    try :
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError, TypeError) :
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_ssize_t
+
+    def call (*args) :
+        result = func(*args)
+        if result < 0 :
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return result
+    return call
+
+
+# Use the os module versions where we have them
+if hasattr(os, 'copy_file_range') :
+    def copyFileRange (src, dst, count) :
+        return os.copy_file_range(src, dst, count)
+else :
+    _copyFileRange = libcCall('copy_file_range', ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint)
+    if _copyFileRange :
+        def copyFileRange (src, dst, count) :
+            return _copyFileRange(src, None, dst, None, count, 0)
+    else :
+        copyFileRange = None
+
+if hasattr(os, 'sendfile') :
+    def sendFile (src, dst, count) :
+        return os.sendfile(dst, src, None, count)
+else :
+    _sendFile = libcCall('sendfile', ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t)
+    if _sendFile :
+        def sendFile (src, dst, count) :
+            return _sendFile(dst, src, None, count)
+    else :
+        sendFile = None
+
+
+def reflink (src, dst) :
+    '''Make the target share the source's blocks.'''
+
+    fcntl.ioctl(dst, FICLONE, src)
+
+
+def kernelCopy (call, src, dst, size) :
+    '''Keep calling a kernel copy function until the whole file is done.
+    Some file systems (FUSE, NFS and the like) stop early with nothing
+    said, so if less than size bytes were copied an error is raised that
+    makes copyFile() fall back to the next way.'''
+
+    copied = 0
+    while True :
+        n = call(src, dst, maxChunk)
+        if n <= 0 :
+            break
+        copied += n
+    if copied < size :
+        raise OSError(errno.EINVAL, 'Kernel copy stopped after ' + str(copied) + ' of ' + str(size) + ' bytes')
+
+
+def rewind (src, dst) :
+    '''Put both files back to the start after a copy way failed part way.'''
+
+    os.lseek(src, 0, os.SEEK_SET)
+    os.lseek(dst, 0, os.SEEK_SET)
+    os.ftruncate(dst, 0)
+
+
+def copyFile (source, target) :
+    '''Copy the data and permission bits of source to target, which must be
+    a full file path, and return the name of the strategy that did it.'''
+
+    srcStat = os.stat(source)
+    with phase('copy', srcStat.st_size) :
+        with open(source, 'rb') as fsrc :
+            with open(target, 'wb') as fdst :
+                src = fsrc.fileno()
+                dst = fdst.fileno()
+                tries = []
+                if fcntl and srcStat.st_dev not in noReflink and srcStat.st_dev == os.fstat(dst).st_dev :
+                    tries.append(('reflink', reflink))
+                # A size of 0 could be a pseudo file whose size isn't known,
+                # only a plain read can be trusted with those
+                if copyFileRange and srcStat.st_size :
+                    tries.append(('copy_file_range', lambda s, d : kernelCopy(copyFileRange, s, d, srcStat.st_size)))
+                if sendFile and srcStat.st_size :
+                    tries.append(('sendfile', lambda s, d : kernelCopy(sendFile, s, d, srcStat.st_size)))
+                for name, func in tries :
+                    try :
+                        func(src, dst)
+                    except (IOError, OSError) as e :
+                        if e.errno not in fallBackErrors :
+                            raise
+                        if name == 'reflink' :
+                            noReflink.add(srcStat.st_dev)
+                        rewind(src, dst)
+                        continue
+                    break
+                else :
+                    name = 'shutil'
+                    shutil.copyfileobj(fsrc, fdst, 1048576)
+        shutil.copymode(source, target)
+
+    return name
+
+
+def hashFile (fileObject, hashobj) :
+    '''Feed the rest of an open file to a hash object.'''
+
+    return hashRest(fileObject, hashobj, hashChunk)
+
+
+def copyAndHash (source, target, hash=hashlib.md5, verify=False) :
+    '''Copy source to target like copyFile() while taking a check sum of the
+    data. Returns the strategy and the hex digest. With verify set the
+    target is read back after it has been synced to disk and an IOError is
+    raised if its sum is not the same.'''
+
+    srcStat = os.stat(source)
+    with phase('copy', srcStat.st_size) :
+        hashobj = hash()
+        with open(source, 'rb') as fsrc :
+            with open(target, 'wb') as fdst :
+                name = None
+                if fcntl and srcStat.st_dev not in noReflink and srcStat.st_dev == os.fstat(fdst.fileno()).st_dev :
+                    try :
+                        reflink(fsrc.fileno(), fdst.fileno())
+                        name = 'reflink'
+                    except (IOError, OSError) as e :
+                        if e.errno not in fallBackErrors :
+                            raise
+                        noReflink.add(srcStat.st_dev)
+                        rewind(fsrc.fileno(), fdst.fileno())
+                if name :
+                    digest = hashFile(fsrc, hashobj)
+                else :
+                    name = 'hashed'
+                    buf = readBuffer(hashChunk)
+                    into = buf if len(buf) == hashChunk else memoryview(buf)[:hashChunk]
+                    while True :
+                        n = fsrc.readinto(into)
+                        if not n :
+                            break
+                        hashobj.update(window(buf, n))
+                        fdst.write(window(buf, n))
+                    digest = hashobj.hexdigest()
+                if verify :
+                    fdst.flush()
+                    os.fsync(fdst.fileno())
+        shutil.copymode(source, target)
+
+        if verify :
+            with open(target, 'rb') as f :
+                if hashFile(f, hash()) != digest :
+                    raise IOError(errno.EIO, 'Copy does not match its source', target)
+
+    return name, digest
+
@@ -32,15 +32,39 @@
 ###############################################################################
 
 # Import all needed Python libs
-import codecs, shutil, os, sys, argparse, timeit, hashlib
+import codecs, shutil, os, sys, argparse, timeit, hashlib, threading
+try :
+    import queue
+except ImportError :
+    import Queue as queue
+from collections import defaultdict, OrderedDict
 from datetime import datetime
 from datetime import timedelta
+from copyEngine import copyFile, copyAndHash, strategies
+from treeWalker import walk, scanDir
+from scanSnapshot import Snapshot
+from hashCache import statKey
+from fileFilter import compileFilter
+from logWriter import LogWriter, readLog, logFormats
+from hashEngine import mdfiveSum, cachedSum, fileDigest, newHash, hashAlgorithms
+from transferPlan import planWriter
+from ioScheduler import schedule, ioOrders
+from profiler import Profile, phase
+from contentStore import ContentStore, storeName
 
 # Set some global vars here
 scriptName      = 'dataMiner'
 scriptVersion   = '0.01'
 startTime       = timeit.default_timer()
 
+# The journal dig keeps in the target folder so a run can be resumed
+journalName     = 'dataMiner_journal.csv'
+journalFields   = ['event', 'source', 'target', 'dirCount', 'fileCount']
+# The snapshot of the last walk used by incremental runs
+snapshotName    = 'dataMiner_snapshot.db'
+# The plan file written in plan mode if no other is given
+planName        = 'dataMiner_plan.csv'
+
 
 ###############################################################################
 ################################## Begin CLI ##################################
@@ -56,14 +80,11 @@ print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion
 # Define functions
 
 
-def md5sum (fname) :
-    '''Get an md5 sum on a file.'''
+def md5sum (fname, cache=None) :
+    '''Get an md5 sum on a file. If a hash cache is given the sum is only
+    worked out if the file has changed since it was last cached.'''
 
-    hash_md5 = hashlib.md5()
-    with open(fname, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    return cachedSum(fname, mdfiveSum, 'md5', cache)
 
 
 def tStamp () :
@@ -99,95 +120,361 @@ def terminal (msg) :
     print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
 
 
-def writeToLog (msg, log) :
-    '''Write to the session log file.'''
-
-    try :
-        # Because we want to read errors from top to bottom, we don't pre append
-        # them to the error log file.
-        if not os.path.isfile(log) :
-            writeObject = codecs.open(log, "w", encoding='utf_8')
-        else :
-            writeObject = codecs.open(log, "a", encoding='utf_8')
-
-        # Write and close
-        writeObject.write(msg + '\n')
-        writeObject.close()
-    except :
-        terminal('Error writing this event to error log: ' + msg)
-
-    return
-
-
-def dig (sourcePath, targetPath, fileType, sizeMultiplier='bt', fileSize=1, targetDirs=None, mode='test', log=None) :
+def transfer (source, target, mode, checksum=False, verify=False, algorithm='md5') :
+    '''Copy or move a single file. Return the copy strategy that was used,
+    or the mode if the file was moved, and the sum of the file if
+    checksum is set. A copy is hashed as it is made so the data is only
+    read once. With verify set the copy is read back and checked too. The
+    sum can be taken with any of the hashAlgorithms in hashEngine.py.'''
+
+    if mode == 'copy' :
+        if checksum :
+            return copyAndHash(source, target, newHash(algorithm), verify)
+        return copyFile(source, target), None
+    with phase('move') :
+        shutil.move(source, target)
+    if checksum :
+        return mode, fileDigest(target, algorithm)
+    return mode, None
+
+
+def transferWorker (work, mode, report, checksum=False, verify=False, algorithm='md5', store=None) :
+    '''Take (source, target, size) jobs off the work queue and copy or move
+    them until a None comes off the queue. Every job is passed on to the
+    report function along with its strategy, or the error if it failed.
+    With checksum set, the sum and stat key of the target are passed on
+    as well. With a content store (see contentStore.py) the file goes into
+    the store and is linked to its target, which may be given a new name,
+    and how it was linked is passed on too.'''
+
+    while True :
+        job = work.get()
+        if job is None :
+            return
+        source, target, size = job
+        try :
+            linked = None
+            if store :
+                strategy, digest, target, linked = store.transfer(source, target, mode)
+                if not checksum :
+                    digest = None
+            else :
+                strategy, digest = transfer(source, target, mode, checksum, verify, algorithm)
+            key = statKey(os.stat(target)) if digest else None
+            report(source, size, strategy, None, target, digest, key, linked)
+        except (IOError, OSError, shutil.Error) as e :
+            report(source, size, None, e)
+
+
+def loadJournal (journalFile) :
+    '''Read back the journal of an earlier dig. Returns a dict of the files
+    that were given a target but not finished, a set of the files that were
+    finished and the (dirCount, fileCount) folder state after the last file
+    was given a target, or None if there wasn't one.'''
+
+    assigned = {}
+    done = set()
+    state = None
+    for event, source, target, dirCount, fileCount in readLog(journalFile, journalFields) :
+        if event == 'assign' :
+            assigned[source] = target
+            state = (int(dirCount), int(fileCount))
+        elif event == 'done' :
+            done.add(source)
+    for source in done :
+        assigned.pop(source, None)
+
+    return assigned, done, state
+
+
+def dig (sourcePath, targetPath, fileType, sizeMultiplier='bt', fileSize=1, targetDirs=None, mode='test', log=None, jobs=4, logFormat='text', resume=False, batchSize=256, incremental=False, checksum=False, verify=False, fileFilter=None, planFile=None, ioOrder='walk', algorithm='md5', store=False) :
     '''Dig is what we do and the ground (source) is where the data is. This
     starts the process and from here we find the data, sift through it and
-    then move or copy it to where we need it to go.'''
+    then move or copy it to where we need it to go. The walk and the sifting
+    are done here, which also decides which folder each file goes in. The
+    copying or moving is handed over a bounded queue to a number of worker
+    threads (jobs) so the walk never waits on a big copy and never gets
+    too far ahead of the workers.
+
+    Unless testing, a journal is kept in the target folder. The target of
+    each file and the folder count are written to it, and flushed, in
+    batches before the files are handed to the workers, and each finished
+    file is written after. Finished files are only written to the journal
+    once the check sum files have been flushed, so the journal never says a
+    file is done before its sum is in its checkSum.txt. With resume set, the journal of an earlier run is
+    read back so finished files are skipped, unfinished ones go to the same
+    place as before and new ones carry on filling the folders where the
+    last run left off.
+
+    With incremental set, only files that are new or have changed since
+    the last incremental run from the same source are looked at, see
+    scanSnapshot.py. The folders carry on from where the last run left
+    them too. The snapshot is only updated when not testing.
+
+    With checksum set, each file is hashed as it is copied and a
+    checkSum.txt that compareSums can use is written into each folder the
+    files go to. With verify set, each copy is also read back and checked.
+
+    The file types and minimum size are turned into a filter expression
+    (see fileFilter.py) along with any fileFilter given, and compiled into
+    one test that is run on each file found.
+
+    In plan mode nothing is copied or moved, as in test mode, but the
+    source and target of each file are written to planFile so the plan can
+    be carried out later with transferPlan.py. No journal or check sums are
+    kept and the snapshot is not updated.
+
+    Each batch handed to the workers is put in the ioOrder given first (see
+    ioScheduler.py) so the source disk is read in fewer, longer sweeps.
+
+    With store set, the data of each file is kept once in a store in the
+    target folder, filed by its sum, and hard linked into the target
+    folders (see contentStore.py). A file with the same data as one
+    already stored is not kept again, and a name already taken in a
+    folder by other data is given a new name rather than replaced.'''
 
-    # Use float() rather than int() so decimals can be used in file sizes
-    fs = float(fileSize)
     totalFiles = 0
     fileCount = 0
     dirCount = 1
+    skipped = 0
+    copiedBy = defaultdict(int)
+    linkedBy = defaultdict(int)
+    failed = []
+    # Files done but not yet written to the journal, see syncJournal()
+    finished = []
+    lock = threading.Lock()
+    journalFile = os.path.join(targetPath, journalName)
+    dryRun = mode in ('test', 'plan')
+    plan = planWriter(planFile) if mode == 'plan' else None
+
+    # Pick up where the last run left off
+    assigned = {}
+    done = set()
+    state = None
+    if resume :
+        if not os.path.isfile(journalFile) :
+            sys.exit('\nERROR: No journal to resume from was found in: ' + targetPath)
+        assigned, done, state = loadJournal(journalFile)
+        terminal('\n\nResuming, ' + str(len(done)) + ' files already done.')
+    elif incremental and os.path.isfile(journalFile) :
+        # Only the folder state is wanted, everything else was finished
+        assigned, done, state = loadJournal(journalFile)
+        assigned = {}
+        done = set()
+
+    # Only look at what has changed since last time
+    snapshot = None
+    scan = scanDir
+    if incremental :
+        snapshot = Snapshot(os.path.join(targetPath, snapshotName), sourcePath)
+        scan = snapshot.scan
 
     # Set up the target dir if needed
     if targetDirs :
         targetDirs = int(targetDirs)
-        curDir = os.path.join(targetPath, 'dir_' + str(dirCount).zfill(3))
-        if not os.path.isdir(curDir) :
-            if mode != 'test' :
-                os.mkdir(curDir)
-            dirCount +=1
+        if state :
+            dirCount, fileCount = state
+            curDir = os.path.join(targetPath, 'dir_' + str(dirCount - 1).zfill(3))
+            if not os.path.isdir(curDir) and not dryRun :
+                with phase('mkdir') :
+                    os.mkdir(curDir)
+        else :
+            curDir = os.path.join(targetPath, 'dir_' + str(dirCount).zfill(3))
+            if not os.path.isdir(curDir) :
+                if not dryRun :
+                    with phase('mkdir') :
+                        os.mkdir(curDir)
+                dirCount +=1
     else :
         curDir = targetPath
 
-    # Create log file path
+    # Create log file, this also replaces any old one unless resuming
     if log :
-        logFile = os.path.join(targetPath, 'dataMiner_log.txt')
-        if os.path.isfile(logFile) :
-            os.remove(logFile)
-
-    if sizeMultiplier == 'bt' :
-        ms = fs
-    elif sizeMultiplier == 'kb' :
-        ms = fs * 1024
-    elif sizeMultiplier == 'mb' :
-        ms = fs * 1048576
-    elif sizeMultiplier == 'gb' :
-        ms = fs * 1073741824
-
+        log = LogWriter(os.path.join(targetPath, 'dataMiner_log.txt'), ['source', 'size', 'strategy'], logFormat, append=resume)
+    journal = None
+    if not dryRun :
+        journal = LogWriter(journalFile, journalFields, 'csv', append=resume or state is not None)
+
+    # Build the test that picks the files, decimals can be used in sizes
+    tests = []
+    if fileType :
+        tests.append('ext:' + ','.join(fileType))
+    if fileSize :
+        # Written out in full, fileFilter can't read 1e-05 or 1.2e+11
+        tests.append('size:>=' + ('%f' % float(fileSize)) + (sizeMultiplier or 'bt'))
+    if fileFilter :
+        tests.append(fileFilter)
+    select = compileFilter(' '.join(tests))
+
+    # The check sum files for each target folder, only a few are kept open
+    manifests = OrderedDict()
+    manifested = set()
+    appendManifests = resume or state is not None
+
+    def manifest (folder) :
+        '''Return the check sum writer for a target folder.'''
+
+        if folder not in manifests :
+            if len(manifests) >= 16 :
+                manifests.popitem(last=False)[1].close()
+            manifests[folder] = LogWriter(os.path.join(folder, 'checkSum.txt'), ['name', algorithm, 'size', 'mtime'],
+                append=appendManifests or folder in manifested)
+            manifested.add(folder)
+        return manifests[folder]
+
+    def report (source, size, strategy, error, target=None, digest=None, key=None, linked=None) :
+        '''Record the outcome of one file, this is called from the workers.'''
+
+        with lock :
+            if error :
+                failed.append(source)
+                terminal('Could not ' + mode + ' file: ' + source + ' (' + str(error) + ')')
+                return
+            if digest and linked != 'same' :
+                manifest(os.path.dirname(target)).write(os.path.basename(target), digest, key[2], key[3])
+            if journal :
+                finished.append(source)
+            if strategy in strategies :
+                copiedBy[strategy] +=1
+            if strategy == 'duplicate' :
+                linkedBy[strategy] +=1
+            if linked :
+                linkedBy[linked] +=1
+            if log :
+                if strategy in strategies :
+                    log.write(source, size, strategy)
+                else :
+                    log.write(source, size)
+
+    # Start up the workers
+    work = queue.Queue(max(1, int(jobs)) * 64)
+    workers = []
+    if store and not dryRun :
+        store = ContentStore(os.path.join(targetPath, storeName), algorithm, verify)
+    else :
+        store = None
+    if not dryRun :
+        for i in range(max(1, int(jobs))) :
+            worker = threading.Thread(target=transferWorker, args=(work, mode, report, checksum or verify, verify, algorithm, store))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+    def syncJournal () :
+        '''Flush the check sum files, then write the files finished since
+        last time to the journal and flush it. This must be called with the
+        lock held.'''
+
+        for folder in manifests :
+            manifests[folder].flush()
+        for source in finished :
+            journal.write('done', source)
+        del finished[:]
+        journal.flush()
+
+    def handOver (batch) :
+        '''Make sure the journal has a batch before the workers get it.'''
+
+        with lock :
+            syncJournal()
+        for job in schedule(batch, ioOrder, key=lambda job : job[0]) :
+            work.put(job)
+
+    batch = []
     terminal('\n\nProcessing files, please wait as this might take a while.')
-    for root, dirs, files in os.walk(sourcePath):
-        for f in files:
+    for entry in walk(sourcePath, scan=scan) :
+        f = entry.name
+        source = entry.path
+        if snapshot :
+            try :
+                if not snapshot.isNew(entry) :
+                    continue
+            except OSError :
+                continue
+        # Look only at the files we want, the name is checked before any stat
+        try :
+            with phase('filter') :
+                wanted = select(entry)
+            if not wanted :
+                continue
+            with phase('stat') :
+                size = entry.stat().st_size
+        except OSError :
+            continue
+        totalFiles +=1
+        if source in done :
+            skipped +=1
+            continue
+        if source in assigned :
+            # This one already has a place from the last run
+            target = assigned.pop(source)
+            if not dryRun and not os.path.isdir(os.path.dirname(target)) :
+                with phase('mkdir') :
+                    os.makedirs(os.path.dirname(target))
+        else :
             if targetDirs :
-                if fileCount >= targetDirs : 
+                if fileCount >= targetDirs :
                     curDir = os.path.join(targetPath, 'dir_' + str(dirCount).zfill(3))
                     if not os.path.isdir(curDir) :
-                        if mode != 'test' :
-                            os.mkdir(curDir)
+                        if not dryRun :
+                            with phase('mkdir') :
+                                os.mkdir(curDir)
                     fileCount = 0
                     dirCount +=1
                     sys.stdout.write('.')
                     sys.stdout.flush()
-            source = os.path.join(root, f)
-            # Look only at the file type we want
-            ext = os.path.splitext(f)
-            ext = ext[1].replace('.', '')
-            if ext in fileType :
-                size = os.path.getsize(source)
-                # evaluate by size
-                if ( int(size) >= int(ms) ) :
-                    fileCount +=1
-                    totalFiles +=1
-                    if mode != 'test' :
-                        if mode == 'copy' :
-                            shutil.copy(source, os.path.join(curDir, f))
-                        if mode == 'move' :
-                            shutil.move(source, os.path.join(curDir, f))
-                    if log :
-                        writeToLog(source + ', ' + str(size), logFile)
-
-    terminal('\n\nTotal files copied: ' + str(totalFiles) + ' / Folders created: ' + str(dirCount))
+            fileCount +=1
+            target = os.path.join(curDir, f)
+            if journal :
+                with lock :
+                    journal.write('assign', source, target, dirCount, fileCount)
+        if not dryRun :
+            batch.append((source, target, size))
+            if len(batch) >= batchSize :
+                handOver(batch)
+                batch = []
+        else :
+            if plan :
+                plan.write(source, target)
+            report(source, size, None, None)
+    if batch :
+        handOver(batch)
+
+    # Tell the workers there's no more to do and wait for them to finish
+    for worker in workers :
+        work.put(None)
+    for worker in workers :
+        worker.join()
+    if log :
+        log.close()
+    if journal :
+        syncJournal()
+        journal.close()
+    if plan :
+        plan.close()
+    for folder in manifests :
+        manifests[folder].close()
+    if snapshot :
+        if not dryRun :
+            # Anything that failed should be tried again next time
+            for source in failed :
+                snapshot.forget(source)
+            snapshot.save()
+        else :
+            snapshot.close()
+        terminal('\n\nFolders not changed since the last run: ' + str(snapshot.unchanged))
+
+    if plan :
+        terminal('\n\nPlanned ' + str(totalFiles - skipped) + ' files, written to: ' + planFile)
+    terminal('\n\nTotal files copied: ' + str(totalFiles - len(failed) - skipped) + ' / Folders created: ' + str(dirCount))
+    if skipped :
+        terminal('Files already done: ' + str(skipped))
+    if failed :
+        terminal('Files that failed: ' + str(len(failed)))
+    if copiedBy :
+        terminal('Copied by: ' + ', '.join(s + ' ' + str(copiedBy[s]) for s in strategies if s in copiedBy))
+    if store :
+        terminal('Already in the store: ' + str(linkedBy['duplicate']) + ' / Renamed: ' + str(linkedBy['renamed']) + ' / Already in place: ' + str(linkedBy['same']))
 
     return
 
@@ -224,8 +511,17 @@ def userArguments (args) :
         fileType = args.file_type.lower()
         if type(fileType) != list :
             fileType = fileType.split()
+    elif args.filter :
+        fileType = None
     else :
-        sys.exit('\nERROR: No file type was specified')
+        sys.exit('\nERROR: No file type or filter was specified')
+
+    # Make sure the filter makes sense before we start
+    if args.filter :
+        try :
+            compileFilter(args.filter)
+        except ValueError as e :
+            sys.exit('\nERROR: ' + str(e))
 
     # If this isn't used a default will be assigned
     if args.size_multiplier :
@@ -236,6 +532,11 @@ def userArguments (args) :
     # Same as the previous setting
     if args.file_size :
         fileSize = args.file_size
+        try :
+            if not 0 <= float(fileSize) < float('inf') :
+                raise ValueError
+        except ValueError :
+            sys.exit('\nERROR: File size <' + fileSize + '> is not a valid number!')
     else :
         fileSize = None
 
@@ -245,7 +546,7 @@ def userArguments (args) :
     if args.target_dirs :
         targetDirs = args.target_dirs
     else :
-        move = None
+        targetDirs = None
 
     # The default is to copy the file, this gives the option to move it
     if args.mode :
@@ -254,11 +555,25 @@ def userArguments (args) :
         sys.exit('\nERROR: Mode was not specified')
 
     # The default is to have no log file.
-    if args.log :
-        log = args.log
+    log = args.log
+
+    # The number of files to copy or move at the same time
+    jobs = args.jobs
+
+    # Plans go in the target folder unless said otherwise
+    planFile = args.plan_file or os.path.join(targetPath, planName)
+
+    # Time each phase of the work if asked, cProfile stats go to a file
+    profile = None
+    if args.profile :
+        profile = Profile(None if args.profile is True else args.profile).start()
 
     # With all our paramters in place we can call the main function
-    dig(sourcePath, targetPath, fileType, sizeMultiplier, fileSize, targetDirs, mode, log)
+    dig(sourcePath, targetPath, fileType, sizeMultiplier, fileSize, targetDirs, mode, log, jobs, args.log_format, args.resume,
+        incremental=args.incremental, checksum=args.checksum, verify=args.verify, fileFilter=args.filter, planFile=planFile, ioOrder=args.io_order, algorithm=args.algorithm, store=args.store)
+
+    if profile :
+        print '\n' + profile.stop().report()
 
 
 ###############################################################################
@@ -275,7 +590,7 @@ if __name__ == '__main__' :
     helpCommand = subparsers.add_parser('help', help='General system help')
 
     sizeType            = ['bt', 'kb', 'mb', 'gb']
-    modeType            = ['copy', 'move', 'test']
+    modeType            = ['copy', 'move', 'test', 'plan']
 
     # Available choices
     parser = argparse.ArgumentParser()
@@ -285,8 +600,20 @@ if __name__ == '__main__' :
     parser.add_argument('-m', '--size_multiplier', choices=sizeType, help='The byte data size multiplier.')
     parser.add_argument('-f', '--file_size', help='The minumum size of the data files. This number must be a multiple of a byte.')
     parser.add_argument('-d', '--target_dirs', help='The number of files that will go in a folder. None is the default which means no folders will be made. All the files will be copied/moved into the target path.')
-    parser.add_argument('-o', '--mode', choices=modeType, help='There are three modes this script can run in. Copy files, move files, or just testing to see what files would be copied or moved.')
-    parser.add_argument('-l', '--log', action='store_true', help='This switch will cause a log file to be created in the target folder.')
+    parser.add_argument('-o', '--mode', choices=modeType, help='There are four modes this script can run in. Copy files, move files, just testing to see what files would be copied or moved, or plan which also writes where each file would go to a plan file. A plan is carried out with transferPlan.py.')
+    parser.add_argument('-p', '--plan_file', help='The plan file to write in plan mode. The default is ' + planName + ' in the target folder.')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='The number of files to copy or move at the same time. The default is 4.')
+    parser.add_argument('-l', '--log', action='store_true', help='This switch will cause a log file to be created in the target folder. In copy mode the way each file was copied is logged with it.')
+    parser.add_argument('-r', '--resume', action='store_true', help='This switch will carry on from where an earlier run into the same target folder was stopped. Files already done are skipped and new ones go into the same folders they would have.')
+    parser.add_argument('-i', '--incremental', action='store_true', help='This switch will only look at files that are new or have changed since the last incremental run from the same source into the same target. Folders that have not changed are not read at all. Use the same file type and size on each run.')
+    parser.add_argument('-x', '--filter', help='A filter expression to pick files with, on top of the file type and size. For example "size:<2gb age:<30d !path:*/cache/*". See fileFilter.py for all the tests.')
+    parser.add_argument('-c', '--checksum', action='store_true', help='This switch will take an md5 sum of each file as it is copied or moved and write a checkSum.txt file into each target folder, the same as checkSumGetter does.')
+    parser.add_argument('-a', '--algorithm', choices=sorted(hashAlgorithms), default='md5', help='The hash used for the checksum, verify and store switches. It is named in each checkSum.txt file so compareSums uses it too. The default is md5.')
+    parser.add_argument('-v', '--verify', action='store_true', help='This switch will read back each copy and check it against the sum of its source. This turns on the checksum switch too.')
+    parser.add_argument('--store', action='store_true', help='This switch will keep the data of each file once in a ' + storeName + ' folder in the target, filed by its sum, and hard link it into the target folders. Files with the same data are only kept once, after a byte for byte check, and a name already taken in a folder by other data is given a new name. Without hard links the data is copied out of the store instead. Files changed in place change everywhere they are linked.')
+    parser.add_argument('--io_order', choices=ioOrders, default='walk', help='The order each batch of files is read in. Walk is the order they are found in, inode sorts them by inode number and physical by where they are on the disk. The last two are much faster on spinning disks. The default is walk.')
+    parser.add_argument('--profile', nargs='?', const=True, help='This switch will report the time taken by each phase of the work, such as listing folders, hashing and copying, with rates and times per file. If a file is given, cProfile stats are written to it too.')
+    parser.add_argument('--log_format', choices=logFormats, default='text', help='The format of the log file, text, csv or jsonl. The default is text.')
 
     # Send the collected arguments to the handler
     userArguments(parser.parse_args())
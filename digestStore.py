@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Digest Store (digestStore.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It lets removeDups find the
+# files that share a size or sum in a tree of any number of files without
+# holding them all in memory. There are two parts:
+#
+#   PathTable   - Every path, written one after the other to a temp file.
+#                 A path is known by where it starts in the file, so the
+#                 numbers go up in the order the paths were added.
+#   DigestStore - Fixed width records of a key (a size, a sum or both, as
+#                 bytes) and a path number. Once memoryLimit records are
+#                 held they are sorted and written to a temp file as a run.
+#                 groups() merges the runs back together in key order.
+#
+# Keys and path numbers are packed big endian so sorting the records as
+# plain bytes sorts them by key and then by path, which puts the first
+# path added for a key first in its group.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sys, heapq, struct
+from itertools import groupby
+
+# A path number
+idFormat        = struct.Struct('>Q')
+# How many records are read from a run at a time
+runChunk        = 4096
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def sizeKey (size) :
+    '''The key for a file size.'''
+
+    return idFormat.pack(size)
+
+
+class PathTable (object) :
+    '''Keeps paths in a temp file rather than in memory. add() gives back
+    the number of a path, get() the path for a number.'''
+
+    def __init__ (self, tempDir) :
+
+        self.file           = open(os.path.join(tempDir, 'paths'), 'w+b')
+        self.end            = 0
+        self.writing        = True
+
+    def add (self, path) :
+        '''Add a path and return its number.'''
+
+        if isinstance(path, unicode) :
+            path = path.encode(sys.getfilesystemencoding())
+        if not self.writing :
+            self.file.seek(0, os.SEEK_END)
+            self.writing = True
+        pathId = self.end
+        self.file.write(path + '\0')
+        self.end += len(path) + 1
+        return pathId
+
+    def get (self, pathId) :
+        '''Return the path with this number.'''
+
+        if self.writing :
+            self.file.flush()
+            self.writing = False
+        self.file.seek(pathId)
+        path = ''
+        while True :
+            chunk = self.file.read(4096)
+            if not chunk :
+                return path
+            end = chunk.find('\0')
+            if end >= 0 :
+                return path + chunk[:end]
+            path += chunk
+
+    def close (self) :
+        '''Close the temp file.'''
+
+        self.file.close()
+
+
+class DigestStore (object) :
+    '''Fixed width (key, path number) records, kept sorted on disk once
+    there are more than memoryLimit of them.'''
+
+    def __init__ (self, name, keySize, tempDir, memoryLimit=1000000) :
+
+        self.name           = name
+        self.keySize        = keySize
+        self.recordSize     = keySize + idFormat.size
+        self.tempDir        = tempDir
+        self.memoryLimit    = max(1, int(memoryLimit))
+        self.pending        = []
+        self.runs           = []
+
+    def add (self, key, pathId) :
+        '''Add a path number under a key of keySize bytes.'''
+
+        if len(key) != self.keySize :
+            raise ValueError('Key should be ' + str(self.keySize) + ' bytes, not ' + str(len(key)))
+        self.pending.append(key + idFormat.pack(pathId))
+        if len(self.pending) >= self.memoryLimit :
+            self.spill()
+
+    def spill (self) :
+        '''Sort the records held and write them out as a run.'''
+
+        runFile = os.path.join(self.tempDir, self.name + '_' + str(len(self.runs)))
+        self.pending.sort()
+        with open(runFile, 'wb') as f :
+            f.write(''.join(self.pending))
+        self.runs.append(runFile)
+        self.pending = []
+
+    def readRun (self, runFile) :
+        '''Yield the records in a run.'''
+
+        size = self.recordSize
+        with open(runFile, 'rb') as f :
+            for chunk in iter(lambda : f.read(size * runChunk), '') :
+                for i in range(0, len(chunk), size) :
+                    yield chunk[i:i + size]
+
+    def records (self) :
+        '''Yield all the records in order.'''
+
+        self.pending.sort()
+        if not self.runs :
+            return iter(self.pending)
+        return heapq.merge(self.pending, *[self.readRun(r) for r in self.runs])
+
+    def groups (self, minimum=2) :
+        '''Yield (key, path numbers) for each key that has at least minimum
+        paths, the numbers in the order they were added.'''
+
+        keySize = self.keySize
+        for key, records in groupby(self.records(), lambda r : r[:keySize]) :
+            pathIds = [idFormat.unpack(r[keySize:])[0] for r in records]
+            if len(pathIds) >= minimum :
+                yield key, pathIds
+
+    def close (self) :
+        '''Clean up the runs.'''
+
+        for runFile in self.runs :
+            if os.path.exists(runFile) :
+                os.remove(runFile)
+        self.runs = []
+        self.pending = []
+
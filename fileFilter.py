@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: File Filter (fileFilter.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It turns a filter written as
+# text into a single function that says if a file should be picked. The text
+# is a list of tests separated by spaces, all of which must pass. A test put
+# after a ! leaves out the files that pass it. The tests are:
+#
+#   ext:jpg,png             The file extension is one of these (any case)
+#   size:>1mb               The size, with one of > >= < <= = or a range
+#   size:10kb..2gb          like this. Sizes are in bt, kb, mb, gb or tb.
+#   age:<7d                 The time since the file was last changed, in s,
+#                           m, h, d or w, with the same operators as size.
+#   mtime:>=2016-01-01      The date the file was last changed.
+#   name:IMG_*              A glob on the file name
+#   path:*/DCIM/*           A glob on the full path
+#   re:\d{8}                A regular expression searched for in the path
+#
+# For example: "ext:jpg,jpeg size:>100kb !path:*/thumbnails/*"
+#
+# The tests that only need the name are always run first, so files that are
+# left out by those are never stat()ed.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, re, time
+from fnmatch import fnmatch
+from datetime import datetime
+
+sizeUnits       = {'bt' : 1, 'b' : 1, 'kb' : 1024, 'mb' : 1048576, 'gb' : 1073741824, 'tb' : 1099511627776}
+timeUnits       = {'s' : 1, 'm' : 60, 'h' : 3600, 'd' : 86400, 'w' : 604800}
+operators       = re.compile(r'^(>=|<=|>|<|=)?(.+)$')
+nameKeys        = ['ext', 'name', 'path', 're']
+statKeys        = ['size', 'age', 'mtime']
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def parseSize (text) :
+    '''Turn a size like 10kb into bytes.'''
+
+    match = re.match(r'^([0-9.]+)\s*([a-z]*)$', text.lower())
+    if not match or match.group(2) not in sizeUnits and match.group(2) :
+        raise ValueError('Bad size: ' + text)
+    return float(match.group(1)) * sizeUnits[match.group(2) or 'bt']
+
+
+def parseAge (text) :
+    '''Turn a time like 7d into seconds.'''
+
+    match = re.match(r'^([0-9.]+)\s*([a-z]*)$', text.lower())
+    if not match or match.group(2) not in timeUnits and match.group(2) :
+        raise ValueError('Bad age: ' + text)
+    return float(match.group(1)) * timeUnits[match.group(2) or 's']
+
+
+def parseDate (text) :
+    '''Turn a date like 2016-12-31 into a time stamp.'''
+
+    try :
+        return time.mktime(datetime.strptime(text, '%Y-%m-%d').timetuple())
+    except ValueError :
+        raise ValueError('Bad date: ' + text)
+
+
+def compare (value, parse) :
+    '''Turn a comparison like >=10kb or 10kb..2gb into a function that tests
+    a number against it.'''
+
+    if '..' in value :
+        low, high = value.split('..', 1)
+        low, high = parse(low), parse(high)
+        return lambda n : low <= n <= high
+    match = operators.match(value)
+    if not match :
+        raise ValueError('Missing value in filter test')
+    op, amount = match.groups()
+    amount = parse(amount)
+    if op == '>' :
+        return lambda n : n > amount
+    if op == '>=' :
+        return lambda n : n >= amount
+    if op == '<' :
+        return lambda n : n < amount
+    if op == '<=' :
+        return lambda n : n <= amount
+    return lambda n : n == amount
+
+
+def compileTest (key, value, now) :
+    '''Turn one key:value test into a function. Name tests are given the
+    entry's name and path, stat tests are given its stat() results.'''
+
+    if key == 'ext' :
+        exts = set(e.lower().lstrip('.') for e in value.split(',') if e)
+        return lambda name, path : os.path.splitext(name)[1][1:].lower() in exts
+    if key == 'name' :
+        return lambda name, path : fnmatch(name, value)
+    if key == 'path' :
+        return lambda name, path : fnmatch(path, value)
+    if key == 're' :
+        try :
+            pattern = re.compile(value)
+        except re.error as e :
+            raise ValueError('Bad regular expression: ' + value + ' (' + str(e) + ')')
+        return lambda name, path : pattern.search(path) is not None
+    if key == 'size' :
+        test = compare(value, parseSize)
+        return lambda st : test(st.st_size)
+    if key == 'age' :
+        test = compare(value, parseAge)
+        return lambda st : test(now - st.st_mtime)
+    if key == 'mtime' :
+        test = compare(value, parseDate)
+        return lambda st : test(st.st_mtime)
+    raise ValueError('Unknown filter test: ' + key)
+
+
+def negate (test) :
+    '''Turn a test around.'''
+
+    return lambda *args : not test(*args)
+
+
+def compileFilter (expression, now=None) :
+    '''Compile a filter expression into a function that takes a treeWalker
+    entry and returns True if the file is picked. Raises ValueError if the
+    expression can't be understood.'''
+
+    now = now or time.time()
+    nameTests = []
+    statTests = []
+    for clause in expression.split() :
+        exclude = clause.startswith('!')
+        if exclude :
+            clause = clause[1:]
+        if ':' not in clause :
+            raise ValueError('Filter tests look like key:value, not: ' + clause)
+        key, value = clause.split(':', 1)
+        test = compileTest(key.lower(), value, now)
+        if exclude :
+            test = negate(test)
+        if key.lower() in nameKeys :
+            nameTests.append(test)
+        else :
+            statTests.append(test)
+
+    def predicate (entry) :
+        for test in nameTests :
+            if not test(entry.name, entry.path) :
+                return False
+        if statTests :
+            st = entry.stat()
+            for test in statTests :
+                if not test(st) :
+                    return False
+        return True
+
+    return predicate
+
@@ -0,0 +1,243 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: File Sniffer (fileSniffer.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. Files that come back from
+# Photorec or a tool like it often have the wrong extension or none at all.
+# This works out the real type of a file from the first few hundred bytes of
+# it (the magic bytes) using the table of signatures below. The type is
+# given as the extension the file should have, or '' if it is not known.
+#
+# sniffFiles() reads a batch of files at the same time with a pool of
+# threads. The types found can be kept in the hash cache (hashCache.py) so a
+# file is only read again if it has changed.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, re, struct
+from hashEngine import sumFiles
+
+# How much of each file is read
+sniffSize       = 512
+# The name types are filed under in the hash cache
+sniffName       = 'magic-' + str(sniffSize)
+
+# The signatures, each is (offset, bytes, type). The first one that matches
+# is used, so longer ones go before shorter ones that start the same way.
+signatures = [
+    (0, '\xff\xd8\xff', 'jpg'),
+    (0, '\x89PNG\r\n\x1a\n', 'png'),
+    (0, 'GIF87a', 'gif'),
+    (0, 'GIF89a', 'gif'),
+    (0, 'II*\x00\x10\x00\x00\x00CR', 'cr2'),
+    (0, 'II*\x00', 'tif'),
+    (0, 'MM\x00*', 'tif'),
+    (0, 'BM', 'bmp'),
+    (0, '8BPS', 'psd'),
+    (0, '\x00\x00\x00\x0cjP  \r\n\x87\n', 'jp2'),
+    (0, '%PDF', 'pdf'),
+    (0, '%!PS', 'ps'),
+    (0, '{\\rtf', 'rtf'),
+    (0, 'PK\x03\x04', 'zip'),
+    (0, '\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+    (0, '\x1f\x8b', 'gz'),
+    (0, 'BZh', 'bz2'),
+    (0, '\xfd7zXZ\x00', 'xz'),
+    (0, '7z\xbc\xaf\x27\x1c', '7z'),
+    (0, 'Rar!\x1a\x07', 'rar'),
+    (257, 'ustar', 'tar'),
+    (4, 'ftyp', 'ftyp'),
+    (0, 'RIFF', 'riff'),
+    (0, '\x1a\x45\xdf\xa3', 'mkv'),
+    (0, 'OggS', 'ogg'),
+    (0, 'fLaC', 'flac'),
+    (0, 'ID3', 'mp3'),
+    (0, 'MThd', 'mid'),
+    (0, 'FLV\x01', 'flv'),
+    (0, '\x30\x26\xb2\x75\x8e\x66\xcf\x11', 'wmv'),
+    (0, 'SQLite format 3\x00', 'sqlite'),
+    (0, '\x7fELF', 'elf'),
+    (0, 'MZ', 'exe'),
+    (0, 'wOFF', 'woff'),
+    (0, 'wOF2', 'woff2'),
+    (0, '\x00\x01\x00\x00\x00', 'ttf'),
+    (0, 'OTTO', 'otf'),
+    (0, 'BEGIN:VCARD', 'vcf'),
+    (0, 'BEGIN:VCALENDAR', 'ics'),
+]
+
+# The brands found after ftyp, anything else is taken as mp4
+ftypBrands = {
+    'qt  ' : 'mov',
+    'M4A ' : 'm4a',
+    'M4B ' : 'm4b',
+    'M4V ' : 'm4v',
+    '3gp4' : '3gp',
+    '3gp5' : '3gp',
+    '3gp6' : '3gp',
+    '3g2a' : '3g2',
+    'heic' : 'heic',
+    'heix' : 'heic',
+    'mif1' : 'heic',
+    'avif' : 'avif',
+    'crx ' : 'cr3',
+}
+
+# The types found after RIFF
+riffTypes = {
+    'WAVE' : 'wav',
+    'AVI ' : 'avi',
+    'WEBP' : 'webp',
+}
+
+# The parts of an OOXML file that give its type
+ooxmlParts = [
+    ('word/', 'docx'),
+    ('xl/', 'xlsx'),
+    ('ppt/', 'pptx'),
+]
+
+# Types that can only be told apart by the extension a file already has
+oleTypes        = ['doc', 'xls', 'ppt', 'msg', 'msi']
+zipTypes        = ['docx', 'xlsx', 'pptx', 'jar', 'apk', 'epub', 'odt', 'ods', 'odp', 'odg']
+
+# The sizes of the header that follows the file header in a BMP
+bmpHeaderSizes  = (12, 40, 64, 108, 124)
+
+markupTest      = re.compile(r'\s*<(\?xml|!doctype html|html|svg)', re.I)
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def fileExt (fname) :
+    '''The extension a file has now, without the dot.'''
+
+    return os.path.splitext(fname)[1].replace('.', '').lower()
+
+
+def zipType (head, fname) :
+    '''Work out what sort of zip file this is. ODF files start with a plain
+    mimetype entry which gives their type, OOXML files are told apart by the
+    names of the first parts in them.'''
+
+    if head[30:38] == 'mimetype' :
+        mimeType = head[38:120].split('PK', 1)[0]
+        if mimeType.startswith('application/vnd.oasis.opendocument.') :
+            return {
+                'text' : 'odt',
+                'spreadsheet' : 'ods',
+                'presentation' : 'odp',
+                'graphics' : 'odg',
+            }.get(mimeType.split('.')[-1], 'odt')
+        if mimeType == 'application/epub+zip' :
+            return 'epub'
+    for part, ftype in ooxmlParts :
+        if part in head :
+            return ftype
+    if fileExt(fname) in zipTypes :
+        return fileExt(fname)
+    if '[Content_Types].xml' in head :
+        return 'docx'
+    return 'zip'
+
+
+def isBmp (head) :
+    '''Two bytes of BM are too easy to come by, so the size in the file
+    header has to make sense and the header after it has to be one of the
+    known sizes.'''
+
+    if len(head) < 18 :
+        return False
+    size, dibSize = struct.unpack('<I', head[2:6])[0], struct.unpack('<I', head[14:18])[0]
+    return size >= 14 + dibSize and dibSize in bmpHeaderSizes
+
+
+def isExe (head) :
+    '''Two bytes of MZ are too easy to come by, so the offset at 0x3c has to
+    point at the PE header, which has to be in the part that was read.'''
+
+    if len(head) < 64 :
+        return False
+    offset = struct.unpack('<I', head[60:64])[0]
+    return 64 <= offset and head[offset:offset + 4] == 'PE\0\0'
+
+
+# Signatures that need more than their magic bytes to be believed
+checks = {
+    'bmp' : isBmp,
+    'exe' : isExe,
+}
+
+
+def classify (head, fname='') :
+    '''Return the type of a file from its first bytes, or '' if it is not
+    known. The name is only used to choose between types that look the
+    same, like the different OLE documents.'''
+
+    for offset, magic, ftype in signatures :
+        if head[offset:offset + len(magic)] != magic :
+            continue
+        if ftype in checks and not checks[ftype](head) :
+            continue
+        if ftype == 'zip' :
+            return zipType(head, fname)
+        if ftype == 'ole' :
+            return fileExt(fname) if fileExt(fname) in oleTypes else 'doc'
+        if ftype == 'ftyp' :
+            return ftypBrands.get(head[8:12], 'mp4')
+        if ftype == 'riff' :
+            return riffTypes.get(head[8:12], '')
+        if ftype == 'mkv' :
+            return 'webm' if 'webm' in head[:64] else 'mkv'
+        return ftype
+    # MPEG audio with no tag starts with a frame sync
+    if head[:1] == '\xff' and len(head) > 1 and ord(head[1]) & 0xe0 == 0xe0 :
+        return 'mp3'
+    match = markupTest.match(head)
+    if match :
+        tag = match.group(1).lower()
+        if tag == 'svg' or (tag == '?xml' and '<svg' in head) :
+            return 'svg'
+        return 'xml' if tag == '?xml' else 'html'
+    return ''
+
+
+def sniffType (fname) :
+    '''Read the start of a file and return its type.'''
+
+    with open(fname, 'rb') as f :
+        return classify(f.read(sniffSize), fname)
+
+
+def sniffFiles (files, jobs=None, cache=None) :
+    '''Work out the type of a list of files and yield (file, type) pairs in
+    the same order. The reads are done by a pool of threads (jobs) and with
+    a cache the type of a file that hasn't changed is not read again. The
+    type is None for any file that could not be read.'''
+
+    return sumFiles(files, jobs, sumFunc=sniffType, chunkSize=64, cache=cache, algorithm=sniffName)
@@ -32,16 +32,27 @@
 ###############################################################################
 
 # Import all needed Python libs
-import shutil, os, sys, argparse, timeit
+import shutil, os, sys, argparse, timeit, tempfile, binascii, itertools
 from collections import defaultdict
 from datetime import datetime
 from datetime import timedelta
+from copyEngine import copyFile, strategies
+from treeWalker import walk
+from transferPlan import planWriter
+from fileSniffer import sniffFiles
+from hashCache import HashCache, defaultCacheFile
+from profiler import Profile, phase
 
 # Set some global vars here
 scriptName      = 'fileSorter'
 scriptVersion   = '0.01'
 startTime       = timeit.default_timer()
 
+# The plan file written in plan mode if no other is given
+planName        = 'fileSorter_plan.csv'
+# How many files are sniffed at a time
+sniffBatch      = 4096
+
 
 ###############################################################################
 ################################## Begin CLI ##################################
@@ -89,76 +100,231 @@ def terminal (msg) :
     print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
 
 
-def sorter (sourcePath, targetPath, mode, numFiles=100) :
+class PathSpill (object) :
+    '''Holds the paths found for each extension without keeping them all in
+    memory. Each folder path is only stored once and a file is kept as the
+    number of its folder and its name. Once more than memoryLimit files are
+    held they are written out to a temp file for each extension.'''
+
+    def __init__ (self, memoryLimit=1000000) :
+
+        self.memoryLimit    = memoryLimit
+        self.dirs           = []
+        self.dirIndex       = {}
+        self.pending        = defaultdict(list)
+        self.held           = 0
+        self.tempDir        = None
+        self.spilled        = set()
+
+    def add (self, ext, path) :
+        '''Add the path of a file with this extension.'''
+
+        folder, name = os.path.split(path)
+        i = self.dirIndex.get(folder)
+        if i is None :
+            i = self.dirIndex[folder] = len(self.dirs)
+            self.dirs.append(folder)
+        self.pending[ext].append((i, name))
+        self.held +=1
+        if self.held >= self.memoryLimit :
+            self.spill()
+
+    def spillFile (self, ext) :
+        '''The temp file for an extension, its name is made safe.'''
+
+        return os.path.join(self.tempDir, 'ext_' + binascii.hexlify(ext))
+
+    def spill (self) :
+        '''Write everything held out to the temp files.'''
+
+        if not self.tempDir :
+            self.tempDir = tempfile.mkdtemp(prefix='fileSorter_')
+        for ext, items in self.pending.iteritems() :
+            with open(self.spillFile(ext), 'ab') as f :
+                f.write(''.join(str(i) + '\0' + name + '\0' for i, name in items))
+            self.spilled.add(ext)
+        self.pending.clear()
+        self.held = 0
+
+    def extensions (self) :
+        '''All the extensions found, in order.'''
+
+        return sorted(set(self.pending) | self.spilled)
+
+    def paths (self, ext) :
+        '''Yield the paths for an extension in the order they were added.'''
+
+        if ext in self.spilled :
+            with open(self.spillFile(ext), 'rb') as f :
+                rest = ''
+                for chunk in iter(lambda : f.read(1048576), '') :
+                    fields = (rest + chunk).split('\0')
+                    rest = fields.pop()
+                    # Keep an odd one back for the next chunk
+                    if len(fields) % 2 :
+                        rest = fields.pop() + '\0' + rest
+                    for j in range(0, len(fields), 2) :
+                        yield os.path.join(self.dirs[int(fields[j])], fields[j + 1])
+        for i, name in self.pending.get(ext, []) :
+            yield os.path.join(self.dirs[i], name)
+
+    def close (self) :
+        '''Clean up the temp files.'''
+
+        if self.tempDir :
+            shutil.rmtree(self.tempDir, ignore_errors=True)
+
+
+def sorter (sourcePath, targetPath, mode, numFiles=100, stream=False, memoryLimit=1000000, planFile=None, sniff=False, jobs=None, cache=None) :
     '''Organize the files by type. If fileType is omitted, it will arrange
-    all the files in the data set by type.'''
-
-    fileType = []
-    typeDic = defaultdict(list)
+    all the files in the data set by type.
+
+    Normally all the files are found first and then dealt with one type at
+    a time. The paths are held in a PathSpill so no more than memoryLimit
+    of them are in memory at once. With stream set each file is dealt with
+    as soon as it is found and nothing is held at all. Each type then gets
+    its own folder numbers starting from 001.
+
+    In plan mode nothing is copied or moved, as in test mode, but the
+    source and target of each file are written to planFile so the plan can
+    be carried out later with transferPlan.py. In both modes the folders
+    that would be made are kept track of so the targets are the same as a
+    real run would give.
+
+    With sniff set, files are sorted by the type found from their first
+    few bytes rather than by their extension (see fileSniffer.py), which
+    is used only when the type is not known. The files are sniffed in
+    batches by a number of threads (jobs) and the types can be kept in a
+    hash cache.'''
+
+    fileType = set()
     fileCount = 0
     totalFiles = 0
     dirCount = 1
     ext = ''
+    copiedBy = defaultdict(int)
+    dryRun = mode in ('test', 'plan')
+    planned = set()
+    plan = planWriter(planFile) if mode == 'plan' else None
+
+    def isDir (folder) :
+        '''Check for a folder, or one that would have been made.'''
+
+        return folder in planned or os.path.isdir(folder)
+
+    def makeDir (folder) :
+        '''Make a folder, or just remember it when not making any.'''
+
+        if dryRun :
+            planned.add(folder)
+        else :
+            with phase('mkdir') :
+                os.makedirs(folder)
 
     # Set up the (master) target dir if needed
-    if not os.path.isdir(targetPath) and mode != 'test' :
-        os.mkdir(targetPath)
+    if not isDir(targetPath) :
+        makeDir(targetPath)
         dirCount +=1
 
     masterTarget    = targetPath
     curDir          = ''
 
-    terminal('\n\nProcessing files, please wait as this might take a while.')
-    for root, dirs, files in os.walk(sourcePath):
-        for f in files:
+    def found () :
+        '''Yield each file found along with the type it is sorted by.'''
+
+        entries = walk(sourcePath)
+        if not sniff :
+            for entry in entries :
+                yield entry.path, os.path.splitext(entry.name)[1].replace('.', '')
+            return
+        while True :
+            batch = [entry.path for entry in itertools.islice(entries, sniffBatch)]
+            if not batch :
+                return
+            for source, ftype in sniffFiles(batch, jobs, cache) :
+                yield source, ftype or os.path.splitext(source)[1].replace('.', '')
+
+    def place (source, curDir) :
+        '''Copy or move a file into its folder.'''
+
+        if plan :
+            plan.write(source, os.path.join(curDir, os.path.basename(source)))
+        elif mode == 'copy' :
+            copiedBy[copyFile(source, os.path.join(curDir, os.path.basename(source)))] +=1
+        elif mode == 'move' :
+            with phase('move') :
+                shutil.move(source, os.path.join(curDir, os.path.basename(source)))
+
+    if stream :
+        # For each type, the number of its current folder and how many files
+        # have gone into it
+        buckets = {}
+        terminal('\n\nProcessing files, please wait as this might take a while.')
+        for source, ext in found() :
             totalFiles +=1
-            # We sort by extention
-            ext = os.path.splitext(f)
-            ext = ext[1].replace('.', '')
-            if ext not in fileType :
-                fileType.append(ext)
-            # Add file to dict we will process further down
-            typeDic[ext].append(os.path.join(root, f))
-
-            # Create a folder for each of the extention types under the
-            # master folder if needed
-            if not os.path.isdir(os.path.join(targetPath, ext)) and mode != 'test' :
-                os.mkdir(os.path.join(targetPath, ext))
-
-
-    # Now process the dict we made
-    for ext, sourceFiles in typeDic.iteritems() :
-        # Create initial target folder if needed
-        curDir = os.path.join(targetPath, ext, ext + '_' + str(dirCount).zfill(3))
-        if not os.path.isdir(curDir) and mode != 'test' :
-            sys.stdout.write('.')
-            sys.stdout.flush()
-            os.mkdir(curDir)
-            dirCount +=1
-            fileCount = 1
-        # Loop through the files in this type
-        for source in sourceFiles :
-            if fileCount > numFiles :
-                curDir = os.path.join(targetPath, ext, ext + '_' + str(dirCount).zfill(3))
-                if not os.path.isdir(curDir) and mode != 'test' :
+            bucket = buckets.get(ext)
+            if bucket is None or bucket[1] >= numFiles :
+                bucket = buckets[ext] = [bucket[0] + 1 if bucket else 1, 0]
+                curDir = os.path.join(targetPath, ext, ext + '_' + str(bucket[0]).zfill(3))
+                if not isDir(curDir) :
                     sys.stdout.write('.')
                     sys.stdout.flush()
-                    os.mkdir(curDir)
-                    dirCount +=1
-                    fileCount = 1
-            # Now copy the file over to the target
-            if mode == 'copy' :
-                shutil.copy(source, os.path.join(curDir, os.path.basename(source)))
-            elif mode == 'move' :
-                shutil.move(source, os.path.join(curDir, os.path.basename(source)))
-
-            fileCount +=1
-
-    if  mode == 'test' :
+                    makeDir(curDir)
+            bucket[1] +=1
+            place(source, os.path.join(targetPath, ext, ext + '_' + str(bucket[0]).zfill(3)))
+        fileCount = totalFiles
+        dirCount = sum(b[0] for b in buckets.itervalues())
+    else :
+        typeDic = PathSpill(memoryLimit)
+        terminal('\n\nProcessing files, please wait as this might take a while.')
+        for source, ext in found() :
+            totalFiles +=1
+            # We sort by extention
+            if ext not in fileType :
+                fileType.add(ext)
+                # Create a folder for each of the extention types under the
+                # master folder if needed
+                if not isDir(os.path.join(targetPath, ext)) :
+                    makeDir(os.path.join(targetPath, ext))
+            # Add file to the list we will process further down
+            typeDic.add(ext, source)
+
+        # Now process the lists we made
+        for ext in typeDic.extensions() :
+            # Create initial target folder if needed
+            curDir = os.path.join(targetPath, ext, ext + '_' + str(dirCount).zfill(3))
+            if not isDir(curDir) :
+                sys.stdout.write('.')
+                sys.stdout.flush()
+                makeDir(curDir)
+                dirCount +=1
+                fileCount = 1
+            # Loop through the files in this type
+            for source in typeDic.paths(ext) :
+                if fileCount > numFiles :
+                    curDir = os.path.join(targetPath, ext, ext + '_' + str(dirCount).zfill(3))
+                    if not isDir(curDir) :
+                        sys.stdout.write('.')
+                        sys.stdout.flush()
+                        makeDir(curDir)
+                        dirCount +=1
+                        fileCount = 1
+                # Now copy the file over to the target
+                place(source, curDir)
+
+                fileCount +=1
+        typeDic.close()
+
+    if plan :
+        plan.close()
+        terminal('\n\nPlanned ' + str(totalFiles) + ' files into ' + str(dirCount) + ' folders, written to: ' + planFile)
+    elif  mode == 'test' :
         terminal('\nRunning in test mode. Found ' + str(totalFiles) + ' files to copy.')
         terminal('\n\nTotal files: ' + str(totalFiles) + ' / Files Copied: ' + str(fileCount))
     else :
         terminal('\n\nTotal files copied: ' + str(fileCount) + ' / Folders created: ' + str(dirCount))
+        if copiedBy :
+            terminal('Copied by: ' + ', '.join(s + ' ' + str(copiedBy[s]) for s in strategies if s in copiedBy))
 
     return
 
@@ -196,11 +362,29 @@ def userArguments (args) :
         sys.exit('\nERROR: Mode was not specified')
         
     # The default number of files in a folder is 100
-    numFiles = args.file_number
+    numFiles = int(args.file_number or 100)
+
+    # Plans go in the target folder unless said otherwise
+    planFile = args.plan_file or os.path.join(targetPath, planName)
+
+    # Sniffed types can be kept in a cache between runs
+    cache = None
+    if args.cache :
+        cache = HashCache(args.cache, args.cache_size)
 
+    # Time each phase of the work if asked, cProfile stats go to a file
+    profile = None
+    if args.profile :
+        profile = Profile(None if args.profile is True else args.profile).start()
 
     # With all our paramters in place we can call the main function
-    sorter(sourcePath, targetPath, mode, numFiles)
+    sorter(sourcePath, targetPath, mode, numFiles, args.stream, args.memory_limit, planFile, args.sniff, args.jobs, cache)
+
+    if profile :
+        print '\n' + profile.stop().report()
+
+    if cache :
+        cache.close()
 
 
 ###############################################################################
@@ -216,14 +400,22 @@ if __name__ == '__main__' :
     # Add help subprocess arguments
     helpCommand = subparsers.add_parser('help', help='General system help')
 
-    modeType            = ['copy', 'move', 'test']
+    modeType            = ['copy', 'move', 'test', 'plan']
 
     # Available choices
     parser = argparse.ArgumentParser()
     parser.add_argument('-s', '--source_path', help='The path to the data to be mined.')
     parser.add_argument('-t', '--target_path', help='The path to where the data that is mined will go.')
-    parser.add_argument('-m', '--mode', choices=modeType, help='There are three modes this script can run in. Copy files, move files, or just testing to see what files would be copied or moved.')
+    parser.add_argument('-m', '--mode', choices=modeType, help='There are four modes this script can run in. Copy files, move files, just testing to see what files would be copied or moved, or plan which also writes where each file would go to a plan file. A plan is carried out with transferPlan.py.')
+    parser.add_argument('-k', '--sniff', action='store_true', help='This switch will sort files by the type found from their first few bytes rather than by their extension. The extension is used when the type is not known.')
+    parser.add_argument('-j', '--jobs', type=int, help='The number of files to sniff at the same time. The default is the number of CPUs.')
+    parser.add_argument('-c', '--cache', nargs='?', const=defaultCacheFile, help='This switch will keep sniffed types in a cache file so unchanged files are not read again on the next run. A cache file path can be given, the default is ' + defaultCacheFile + '.')
+    parser.add_argument('--profile', nargs='?', const=True, help='This switch will report the time taken by each phase of the work, such as listing folders, hashing and copying, with rates and times per file. If a file is given, cProfile stats are written to it too.')
+    parser.add_argument('--cache_size', type=int, help='The most entries to keep in the cache file. The least recently used are dropped first. The default is no limit.')
+    parser.add_argument('-p', '--plan_file', help='The plan file to write in plan mode. The default is ' + planName + ' in the target folder.')
     parser.add_argument('-f', '--file_number', help='There is an option to set the number of files that will go into the target folder. The default is 100.')
+    parser.add_argument('-r', '--stream', action='store_true', help='This switch will copy or move each file as soon as it is found rather than finding them all first. Each file type gets its own folder numbers.')
+    parser.add_argument('-l', '--memory_limit', type=int, default=1000000, help='The most file paths to hold in memory before they are written out to temp files. The default is 1000000.')
 
     # Send the collected arguments to the handler
     userArguments(parser.parse_args())
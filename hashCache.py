@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Hash Cache (hashCache.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It keeps the check sums the
+# other scripts work out in an SQLite file so they don't have to be worked out
+# again on the next run. A sum is filed under the device, inode, size and
+# modification time of the file it came from. If any of those change the old
+# sum is simply not found and the file gets hashed again. Each algorithm is
+# kept separately so the md5 and sha1 sums of a file can live side by side.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sqlite3, threading, time
+
+# Where the cache lives if no other place is given
+defaultCacheFile = os.path.join(os.path.expanduser('~'), '.cache', 'dataMiner', 'hashCache.db')
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def statKey (st) :
+    '''Turn the results of os.stat() into the key a sum is filed under.'''
+
+    mtime = getattr(st, 'st_mtime_ns', None)
+    if mtime is None :
+        mtime = int(st.st_mtime * 1000000000)
+    return (st.st_dev, st.st_ino, st.st_size, mtime)
+
+
+def fileKey (fname) :
+    '''Stat a file and return its key.'''
+
+    return statKey(os.stat(fname))
+
+
+class HashCache (object) :
+    '''A check sum cache kept in an SQLite file. One cache can be shared by
+    several threads. Writes are held back and committed in batches, call
+    close() when done so the last of them are saved.'''
+
+    def __init__ (self, cacheFile=defaultCacheFile, maxEntries=None, batchSize=1000) :
+
+        if os.path.dirname(cacheFile) and not os.path.isdir(os.path.dirname(cacheFile)) :
+            os.makedirs(os.path.dirname(cacheFile))
+        self.cacheFile  = cacheFile
+        self.maxEntries = maxEntries
+        self.batchSize  = batchSize
+        self.pending    = 0
+        self.touched    = []
+        self.lock       = threading.Lock()
+        self.db         = sqlite3.connect(cacheFile, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS sums (
+            dev INTEGER, ino INTEGER, size INTEGER, mtime INTEGER,
+            algorithm TEXT, digest TEXT, used REAL,
+            PRIMARY KEY (dev, ino, algorithm))''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS sums_used ON sums (used)')
+        self.db.commit()
+
+    def get (self, key, algorithm) :
+        '''Return the cached sum for a file key or None if there isn't one
+        or the file has changed since it was cached.'''
+
+        dev, ino, size, mtime = key
+        with self.lock :
+            row = self.db.execute('SELECT digest FROM sums WHERE dev=? AND ino=? AND algorithm=? AND size=? AND mtime=?',
+                (dev, ino, algorithm, size, mtime)).fetchone()
+            if row is None :
+                return None
+            self.touched.append((time.time(), dev, ino, algorithm))
+            if len(self.touched) >= self.batchSize :
+                self._flush()
+        return str(row[0])
+
+    def put (self, key, algorithm, digest) :
+        '''File a sum under a file key, replacing whatever was there.'''
+
+        dev, ino, size, mtime = key
+        with self.lock :
+            self.db.execute('INSERT OR REPLACE INTO sums VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (dev, ino, size, mtime, algorithm, digest, time.time()))
+            self.pending +=1
+            if self.pending >= self.batchSize :
+                self._flush()
+
+    def invalidate (self, fname=None) :
+        '''Drop every sum cached for a file, or the whole cache if no file
+        is given.'''
+
+        with self.lock :
+            if fname is None :
+                self.db.execute('DELETE FROM sums')
+            else :
+                st = os.stat(fname)
+                self.db.execute('DELETE FROM sums WHERE dev=? AND ino=?', (st.st_dev, st.st_ino))
+            self.db.commit()
+
+    def evict (self, maxEntries=None) :
+        '''Trim the cache down to maxEntries by dropping the entries that
+        were used least recently.'''
+
+        maxEntries = maxEntries or self.maxEntries
+        if not maxEntries :
+            return
+        with self.lock :
+            self._flush()
+            count = self.db.execute('SELECT COUNT(*) FROM sums').fetchone()[0]
+            if count > maxEntries :
+                self.db.execute('DELETE FROM sums WHERE rowid IN (SELECT rowid FROM sums ORDER BY used LIMIT ?)',
+                    (count - maxEntries,))
+                self.db.commit()
+
+    def close (self) :
+        '''Save anything outstanding, trim the cache and close it.'''
+
+        self.evict()
+        with self.lock :
+            self._flush()
+            self.db.close()
+
+    def _flush (self) :
+        '''Commit the pending writes. The lock must already be held.'''
+
+        if self.touched :
+            self.db.executemany('UPDATE sums SET used=? WHERE dev=? AND ino=? AND algorithm=?', self.touched)
+            self.touched = []
+        self.db.commit()
+        self.pending = 0
+
@@ -0,0 +1,335 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Hash Engine (hashEngine.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It is not a script on its
+# own, it holds the check sum code that the other scripts share. Files can be
+# summed one at a time or handed to a pool of workers so that several files
+# are read and hashed at once. Threads are used by default as hashlib lets go
+# of the GIL while it works on large blocks. A process pool can be used
+# instead when the hashing itself is the bottle neck. If a hash cache is
+# given (see hashCache.py) files that haven't changed are not read at all.
+#
+# Any of the hashAlgorithms can be used, by name. Which there are depends on
+# what is installed:
+#
+#   md5, sha1, sha256   - Always there.
+#   blake2b, blake2s    - Python 3.6 or later, or the pyblake2 package.
+#   xxh64, xxh128       - The xxhash package. These are not cryptographic
+#                         but are many times faster, which is all that is
+#                         needed to pick out files that might be the same.
+#   zlib64              - The crc32 and adler32 of the data side by side.
+#                         Always there and also fast, but weaker than xxh64.
+#
+# fastHash is the fastest of the non cryptographic ones there is. Files are
+# read with readinto() into a buffer that each thread keeps and reuses, so
+# reading big files doesn't make new strings for every chunk. Files of
+# mmapSize or more, like disk images and videos, are memory mapped instead
+# and handed to the hash a slice at a time straight from the map, so there
+# are no reads and no copies at all. The kernel is told the map will be
+# read in order (madvise) where Python lets us, which is 3.8 or later.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, zlib, mmap, hashlib, threading
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from hashCache import fileKey
+from profiler import phase
+try :
+    import xxhash
+except ImportError :
+    xxhash = None
+try :
+    import pyblake2
+except ImportError :
+    pyblake2 = None
+
+# How much of a file is read at a time when hashing
+chunkSize       = 1048576
+# Files this size or more are memory mapped rather than read, 0 turns it off
+mmapSize        = 67108864
+# The read buffer of each thread
+buffers         = threading.local()
+
+# A part of a buffer or map that can be handed to a hash without copying it
+try :
+    buffer
+    def window (buf, size, offset=0) :
+        return buffer(buf, offset, size)
+except NameError :
+    def window (buf, size, offset=0) :
+        return memoryview(buf)[offset:offset + size]
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+class ZlibHash (object) :
+    '''A fast 64 bit non cryptographic hash, the crc32 and adler32 of the
+    data. It works like the hashlib ones.'''
+
+    name = 'zlib64'
+    digest_size = 8
+
+    def __init__ (self, data=b'') :
+
+        self.crc        = 0
+        self.adler      = 1
+        if data :
+            self.update(data)
+
+    def update (self, data) :
+        self.crc = zlib.crc32(data, self.crc)
+        self.adler = zlib.adler32(data, self.adler)
+
+    def hexdigest (self) :
+        return '%08x%08x' % (self.crc & 0xffffffff, self.adler & 0xffffffff)
+
+    def digest (self) :
+        return bytes(bytearray.fromhex(self.hexdigest()))
+
+    def copy (self) :
+        other = ZlibHash()
+        other.crc, other.adler = self.crc, self.adler
+        return other
+
+
+# Every hash there could be, so a manifest made with one that isn't
+# installed here can still be recognised
+knownHashes     = ['md5', 'sha1', 'sha256', 'blake2b', 'blake2s', 'xxh64', 'xxh128', 'zlib64']
+
+# The hashes that are installed, by name
+hashAlgorithms = {
+    'md5' : hashlib.md5,
+    'sha1' : hashlib.sha1,
+    'sha256' : hashlib.sha256,
+    'zlib64' : ZlibHash,
+}
+fastHash = 'zlib64'
+if hasattr(hashlib, 'blake2b') :
+    hashAlgorithms['blake2b'] = hashlib.blake2b
+    hashAlgorithms['blake2s'] = hashlib.blake2s
+elif pyblake2 :
+    hashAlgorithms['blake2b'] = pyblake2.blake2b
+    hashAlgorithms['blake2s'] = pyblake2.blake2s
+if xxhash :
+    hashAlgorithms['xxh64'] = xxhash.xxh64
+    fastHash = 'xxh64'
+    if hasattr(xxhash, 'xxh3_128') :
+        hashAlgorithms['xxh128'] = xxhash.xxh3_128
+    elif hasattr(xxhash, 'xxh128') :
+        hashAlgorithms['xxh128'] = xxhash.xxh128
+
+
+def newHash (algorithm) :
+    '''Return the constructor of a hash by name.'''
+
+    try :
+        return hashAlgorithms[algorithm]
+    except KeyError :
+        raise ValueError('Unknown hash algorithm: ' + str(algorithm) + ', it should be one of: ' + ', '.join(sorted(hashAlgorithms)))
+
+
+def readBuffer (size) :
+    '''Return this thread's read buffer, at least size bytes long.'''
+
+    buf = getattr(buffers, 'buf', None)
+    if buf is None or len(buf) < size :
+        buf = buffers.buf = bytearray(size)
+    return buf
+
+
+def hashMapped (fileObject, hashobj, size=None) :
+    '''Feed the rest of an open file to a hash object from a memory map of
+    it, a slice of size bytes at a time, and return its hex digest. Returns
+    None if the file can't be mapped.'''
+
+    size = size or chunkSize
+    try :
+        mapped = mmap.mmap(fileObject.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OverflowError, EnvironmentError) :
+        return None
+    try :
+        if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL') :
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        offset = fileObject.tell()
+        end = len(mapped)
+        while offset < end :
+            hashobj.update(window(mapped, min(size, end - offset), offset))
+            offset += size
+    finally :
+        mapped.close()
+    fileObject.seek(0, os.SEEK_END)
+    return hashobj.hexdigest()
+
+
+def hashRest (fileObject, hashobj, size=None, mapSize=None) :
+    '''Feed the rest of an open file to a hash object and return its hex
+    digest. If there is mapSize or more of it left it is memory mapped,
+    otherwise it is read with readinto().'''
+
+    if mapSize is None :
+        mapSize = mmapSize
+    if mapSize :
+        try :
+            left = os.fstat(fileObject.fileno()).st_size - fileObject.tell()
+        except (AttributeError, IOError, OSError) :
+            left = 0
+        if left >= mapSize :
+            digest = hashMapped(fileObject, hashobj, size)
+            if digest is not None :
+                return digest
+
+    size = size or chunkSize
+    buf = readBuffer(size)
+    into = buf if len(buf) == size else memoryview(buf)[:size]
+    while True :
+        n = fileObject.readinto(into)
+        if not n :
+            break
+        hashobj.update(window(buf, n))
+    return hashobj.hexdigest()
+
+
+def fileDigest (fname, algorithm='md5', size=None, mapSize=None) :
+    '''Get the sum of a file with any of the hashAlgorithms, reading size
+    bytes at a time, or from a memory map if it is mapSize or bigger.'''
+
+    with open(fname, 'rb', 0) as f :
+        return hashRest(f, newHash(algorithm)(), size, mapSize)
+
+
+def digestFunc (algorithm='md5', size=None, mapSize=None) :
+    '''Return a sum function for an algorithm that can be given to sumFiles,
+    even when it uses a process pool.'''
+
+    newHash(algorithm)
+    return partial(fileDigest, algorithm=algorithm, size=size, mapSize=mapSize)
+
+
+def mdfiveSum (fname) :
+    '''Get an md5 sum on a file.'''
+
+    return fileDigest(fname, 'md5')
+
+
+def safeSum (args) :
+    '''Run a sum function on a file and hand back a (file, sum, key, fresh)
+    tuple. If a sum was already found in the cache it is passed straight
+    back and fresh is False. The sum is None rather than an exception if
+    the file can't be read. This is what the pool workers call so it needs
+    to stay at the module level where it can be pickled.'''
+
+    sumFunc, fname, key, cached = args
+    if cached is not None :
+        return fname, cached, key, False
+    try :
+        with phase('hash') as timer :
+            if timer :
+                timer.nbytes = key[2] if key else os.path.getsize(fname)
+            return fname, sumFunc(fname), key, True
+    except (IOError, OSError) :
+        return fname, None, key, False
+
+
+def cacheLookup (files, sumFunc, cache, algorithm) :
+    '''Build the work list for the pool, looking up each file in the cache
+    on the way if there is one.'''
+
+    for fname in files :
+        key = cached = None
+        if cache :
+            try :
+                key = fileKey(fname)
+                cached = cache.get(key, algorithm)
+            except (IOError, OSError) :
+                pass
+        yield sumFunc, fname, key, cached
+
+
+def cachedSum (fname, sumFunc=mdfiveSum, algorithm='md5', cache=None) :
+    '''Sum a single file, going to the cache first if there is one.'''
+
+    fname, fsum, key, fresh = safeSum(next(cacheLookup([fname], sumFunc, cache, algorithm)))
+    if fsum is None :
+        raise IOError('Could not read file: ' + fname)
+    if fresh and key :
+        cache.put(key, algorithm, fsum)
+    return fsum
+
+
+def defaultJobs () :
+    '''Return the number of workers to use when none was asked for.'''
+
+    try :
+        return cpu_count()
+    except NotImplementedError :
+        return 1
+
+
+def sumFiles (files, jobs=None, processes=False, sumFunc=mdfiveSum, chunkSize=16, cache=None, algorithm='md5') :
+    '''Sum a list of files and yield (file, sum) pairs in the same order the
+    files were given, no matter which worker finishes first. The sum is None
+    for any file that could not be read. With jobs set to 1 everything is
+    done in this thread with no pool at all. When a cache is given, sums
+    are looked up in it first under the algorithm name and new sums are
+    saved back to it.'''
+
+    work = cacheLookup(files, sumFunc, cache, algorithm)
+    jobs = int(jobs or defaultJobs())
+    pool = None
+    if jobs < 2 :
+        results = (safeSum(w) for w in work)
+    else :
+        if processes :
+            pool = Pool(jobs)
+        else :
+            pool = ThreadPool(jobs)
+        results = pool.imap(safeSum, work, chunkSize)
+
+    finished = False
+    try :
+        for fname, fsum, key, fresh in results :
+            if fresh and key :
+                cache.put(key, algorithm, fsum)
+            yield fname, fsum
+        finished = True
+    finally :
+        # Terminating a pool waits on its handler threads, which only wake
+        # up every tenth of a second. Once all the work is done the workers
+        # are idle and closing it is enough. Worker processes still need to
+        # be joined so they are reaped, idle threads just run out.
+        if pool and finished :
+            pool.close()
+            if processes :
+                pool.join()
+        elif pool :
+            pool.terminate()
+            pool.join()
+
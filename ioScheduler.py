@@ -0,0 +1,133 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: I/O Scheduler (ioScheduler.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. On a spinning disk, reading
+# files in the order a walk finds them sends the heads all over the platter.
+# schedule() takes a list of files a batch at a time and hands them back in
+# an order that is closer to where they sit on the disk, one of:
+#
+#   walk        - Leave them as they are.
+#   inode       - By inode number. Most file systems place files with
+#                 nearby inode numbers near each other.
+#   physical    - By where the first block of the file is on the disk, from
+#                 the FIEMAP ioctl. Where FIEMAP is not there (not Linux, or
+#                 a file system without it) the inode number is used.
+#
+# Files on different devices are kept apart, as an order across them means
+# nothing.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, array, errno, struct
+from itertools import islice
+try :
+    import fcntl
+except ImportError :
+    fcntl = None
+
+ioOrders        = ['walk', 'inode', 'physical']
+
+# From linux/fs.h and linux/fiemap.h
+FS_IOC_FIEMAP   = 0xC020660B
+# start, length, flags, mapped extents, extent count, reserved
+fiemapHeader    = struct.Struct('=QQIII4x')
+# logical, physical, length, reserved, flags, reserved
+fiemapExtent    = struct.Struct('=QQQ16xI12x')
+
+# The errors that mean a file system can't do FIEMAP at all
+noFiemapErrors  = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL)
+# Devices FIEMAP has failed on, so it isn't tried on them again
+noFiemap        = set()
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def fiemapOffset (fname, dev=None) :
+    '''Return where the first extent of a file is on the disk. A file with
+    no extents (it is empty) is given 0. Returns None if FIEMAP can't be
+    used on the file. Only a file system that can't do FIEMAP has its
+    device left out after that, not one with a bad file on it.'''
+
+    if fcntl is None or dev in noFiemap :
+        return None
+    buf = array.array('B', fiemapHeader.pack(0, 0xffffffffffffffff, 0, 0, 1) + '\0' * fiemapExtent.size)
+    try :
+        fd = os.open(fname, os.O_RDONLY)
+    except OSError :
+        return None
+    try :
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, buf, True)
+    except (IOError, OSError) as e :
+        if dev is not None and e.errno in noFiemapErrors :
+            noFiemap.add(dev)
+        return None
+    finally :
+        os.close(fd)
+    if not fiemapHeader.unpack_from(buf)[3] :
+        return 0
+    return fiemapExtent.unpack_from(buf, fiemapHeader.size)[1]
+
+
+def orderKey (fname, order) :
+    '''Return the key to sort a file by for an order.'''
+
+    st = os.stat(fname)
+    if order == 'physical' :
+        offset = fiemapOffset(fname, st.st_dev)
+        if offset is not None :
+            return st.st_dev, offset
+    return st.st_dev, st.st_ino
+
+
+def schedule (items, order='walk', key=None, batchSize=4096) :
+    '''Yield the items, a batch at a time, in the order asked for. Each item
+    is a file name or, with key given, something key() can get the name
+    from. Files that can't be looked at go at the end of their batch.'''
+
+    if order == 'walk' :
+        for item in items :
+            yield item
+        return
+    if order not in ioOrders :
+        raise ValueError('Unknown I/O order: ' + str(order))
+
+    items = iter(items)
+    while True :
+        batch = list(islice(items, batchSize))
+        if not batch :
+            return
+        keyed = []
+        for i, item in enumerate(batch) :
+            try :
+                keyed.append((orderKey(key(item) if key else item, order), i))
+            except OSError :
+                keyed.append(((float('inf'), i), i))
+        keyed.sort()
+        for k, i in keyed :
+            yield batch[i]
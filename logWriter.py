@@ -0,0 +1,197 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Log Writer (logWriter.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It writes the log and check
+# sum files for the other scripts. The file is kept open with a big buffer
+# and only flushed every so often, and when the writer is closed or the
+# script exits, rather than being opened and closed for every line.
+#
+# Records can be written in one of three formats:
+#
+#   text    - The original "value, value" lines, with a "# field, field"
+#             line at the top naming the fields. Easy to read but a file
+#             name with a new line in it will break it. Only the first field
+#             is allowed to contain ", ". Files from before there was a
+#             header line are read as the first two fields.
+#   csv     - Comma separated with a header row. Fields are quoted as needed.
+#   jsonl   - One JSON object per line. Names that are not UTF-8 are
+#             written with the bad bytes replaced, so use csv for those.
+#
+# readLog() reads any of them back and works out the format by itself.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, csv, json, time, atexit, weakref, threading
+from profiler import phase
+
+logFormats = ['text', 'csv', 'jsonl']
+utf8Bom = '\xef\xbb\xbf'
+
+# The writers still open, so they can be flushed at exit. They are only held
+# weakly so a writer that is dropped can still be freed.
+openWriters = weakref.WeakSet()
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def toBytes (value) :
+    '''Turn a value into UTF-8 encoded bytes.'''
+
+    if isinstance(value, unicode) :
+        return value.encode('utf_8')
+    return str(value)
+
+
+def toText (value) :
+    '''Turn a value into text that JSON can hold.'''
+
+    if isinstance(value, str) :
+        return value.decode('utf_8', 'replace')
+    return value
+
+
+def csvQuote (value) :
+    '''Quote a csv field if it needs it.'''
+
+    value = toBytes(value)
+    if any(c in value for c in ',"\r\n') or value != value.strip() :
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def closeAll () :
+    '''Close any writers still open, this is run at exit.'''
+
+    for writer in list(openWriters) :
+        writer.close()
+
+atexit.register(closeAll)
+
+
+class LogWriter (object) :
+    '''Write records to a log file in one of the logFormats. Each record is
+    written with write() and has one value for each of the fields. Call
+    close() when done, though anything left is flushed at exit anyway.'''
+
+    def __init__ (self, logFile, fields, fmt='text', append=False, bufferSize=1048576, flushEvery=5.0) :
+
+        if fmt not in logFormats :
+            raise ValueError('Unknown log format: ' + str(fmt))
+        self.logFile    = logFile
+        self.fields     = list(fields)
+        self.fmt        = fmt
+        self.flushEvery = flushEvery
+        self.lastFlush  = time.time()
+        self.lock       = threading.Lock()
+        isNew = not append or not os.path.isfile(logFile) or not os.path.getsize(logFile)
+        self.fileObject = open(logFile, 'ab' if append else 'wb', bufferSize)
+        if isNew :
+            if fmt == 'csv' :
+                self.fileObject.write(','.join(self.fields) + '\n')
+            elif fmt == 'text' :
+                self.fileObject.write('# ' + ', '.join(self.fields) + '\n')
+        openWriters.add(self)
+
+    def format (self, values) :
+        '''Return a record as a line of text.'''
+
+        if self.fmt == 'csv' :
+            return ','.join(csvQuote(v) for v in values) + '\n'
+        if self.fmt == 'jsonl' :
+            return json.dumps(dict(zip(self.fields, (toText(v) for v in values))), sort_keys=True) + '\n'
+        return ', '.join(toBytes(v) for v in values) + '\n'
+
+    def write (self, *values) :
+        '''Write one record. Records with fewer values than there are fields
+        are allowed, the missing ones are left off the end.'''
+
+        line = self.format(values)
+        with self.lock, phase('log', len(line)) :
+            self.fileObject.write(line)
+            if self.flushEvery and time.time() - self.lastFlush > self.flushEvery :
+                self.fileObject.flush()
+                self.lastFlush = time.time()
+
+    def flush (self) :
+        '''Push everything written so far out to the file.'''
+
+        with self.lock :
+            if not self.fileObject.closed :
+                self.fileObject.flush()
+
+    def close (self) :
+        '''Flush and close the file. It is fine to call this more than once.'''
+
+        with self.lock :
+            if not self.fileObject.closed :
+                self.fileObject.close()
+        openWriters.discard(self)
+
+    def __enter__ (self) :
+        return self
+
+    def __exit__ (self, *args) :
+        self.close()
+
+
+def readLog (logFile, fields) :
+    '''Read a log file written in any of the logFormats and yield a list of
+    values for each record, in the order of the fields given. Values a
+    record doesn't have come back as None.'''
+
+    with open(logFile, 'rb') as fileObject :
+        first = fileObject.readline()
+        if first.startswith(utf8Bom) :
+            first = first[len(utf8Bom):]
+        fileObject.seek(-len(first), os.SEEK_CUR)
+        # A csv header is the field names with no spaces
+        header = first.rstrip('\r\n').split(',')
+
+        if first.startswith('{') :
+            for line in fileObject :
+                if line.strip() :
+                    record = json.loads(line)
+                    yield [toBytes(record[f]) if record.get(f) is not None else None for f in fields]
+        elif header[0] == fields[0] and all(h and ' ' not in h for h in header) :
+            reader = csv.reader(fileObject)
+            header = next(reader)
+            for row in reader :
+                record = dict(zip(header, row))
+                yield [record.get(f) for f in fields]
+        else :
+            # Old files with no header line only ever had two fields
+            columns = fields[:2]
+            if first.startswith('# ') :
+                columns = next(fileObject)[2:].rstrip('\r\n').split(', ')
+            for line in fileObject :
+                line = line.rstrip('\r\n')
+                if line :
+                    record = dict(zip(columns, line.rsplit(', ', len(columns) - 1)))
+                    yield [record.get(f) for f in fields]
+
@@ -0,0 +1,269 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Manifest Index (manifestIndex.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It holds a check sum list in
+# a compact binary file (checkSum.bin) rather than the checkSum.txt text file.
+# The file can be memory mapped and a single name looked up in it without
+# reading the rest, or it can be gone through from start to end.
+#
+# The layout of the file is:
+#
+#   header  - magic, version, algorithm name, digest size, record count
+#   records - one fixed width record per file, sorted by name:
+#               name offset, name length, size, mtime, digest
+#   names   - all the names, one after the other
+#
+# As the records are all the same width and sorted, a lookup is a binary
+# search over them. A size or mtime of -1 means it wasn't known.
+#
+# It can also be run as a script to convert a manifest between this format
+# and the text ones, or to look up a name.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sys, mmap, json, struct, binascii, argparse
+from logWriter import LogWriter, readLog, logFormats, utf8Bom
+from hashEngine import hashAlgorithms, knownHashes
+
+# Set some global vars here
+scriptName      = 'Manifest Index'
+scriptVersion   = '0.01'
+
+magic           = 'DMMI'
+version         = 1
+# magic, version, algorithm, digest size, record count
+headerFormat    = struct.Struct('<4sB16sHQ')
+# name offset, name length, size, mtime, then the digest
+recordFormat    = '<QIqq'
+digestSizes     = dict((name, hashAlgorithms[name]().digest_size) for name in hashAlgorithms)
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def writeIndex (indexFile, records, algorithm='md5') :
+    '''Write a binary manifest. Records is a list of (name, hex digest,
+    size, mtime) where size and mtime may be None.'''
+
+    digestSize = digestSizes[algorithm]
+    record = struct.Struct(recordFormat + str(digestSize) + 's')
+    records = sorted(records, key=lambda r : r[0])
+    namesStart = headerFormat.size + record.size * len(records)
+
+    with open(indexFile, 'wb') as f :
+        f.write(headerFormat.pack(magic, version, algorithm, digestSize, len(records)))
+        offset = namesStart
+        for name, digest, size, mtime in records :
+            f.write(record.pack(offset, len(name), intOr(size), intOr(mtime), binascii.unhexlify(digest)))
+            offset += len(name)
+        for name, digest, size, mtime in records :
+            f.write(name)
+
+
+def intOr (value) :
+    '''Turn a value into an int or -1 if there isn't one.'''
+
+    if value is None or value == '' :
+        return -1
+    return int(value)
+
+
+class ManifestIndex (object) :
+    '''A memory mapped binary manifest. Use lookup() to find one name or
+    iterate over it to get every record in name order. Records come back as
+    (name, hex digest, size, mtime) with None for an unknown size or mtime.'''
+
+    def __init__ (self, indexFile) :
+
+        self.fileObject = open(indexFile, 'rb')
+        self.map        = mmap.mmap(self.fileObject.fileno(), 0, access=mmap.ACCESS_READ)
+        fileMagic, fileVersion, algorithm, self.digestSize, self.count = headerFormat.unpack_from(self.map, 0)
+        if fileMagic != magic or fileVersion != version :
+            raise ValueError('Not a version ' + str(version) + ' manifest index: ' + indexFile)
+        self.algorithm  = algorithm.rstrip('\0')
+        self.record     = struct.Struct(recordFormat + str(self.digestSize) + 's')
+
+    def __len__ (self) :
+        return self.count
+
+    def name (self, i) :
+        '''Return the name in record i.'''
+
+        offset, length = struct.unpack_from('<QI', self.map, headerFormat.size + i * self.record.size)
+        return self.map[offset:offset + length]
+
+    def get (self, i) :
+        '''Return record i.'''
+
+        offset, length, size, mtime, digest = self.record.unpack_from(self.map, headerFormat.size + i * self.record.size)
+        return (self.map[offset:offset + length], binascii.hexlify(digest),
+            None if size < 0 else size, None if mtime < 0 else mtime)
+
+    def lookup (self, name) :
+        '''Find a name with a binary search. Returns its record or None.'''
+
+        lo, hi = 0, self.count
+        while lo < hi :
+            mid = (lo + hi) // 2
+            if self.name(mid) < name :
+                lo = mid + 1
+            else :
+                hi = mid
+        if lo < self.count and self.name(lo) == name :
+            return self.get(lo)
+        return None
+
+    def __iter__ (self) :
+        for i in xrange(self.count) :
+            yield self.get(i)
+
+    def close (self) :
+        self.map.close()
+        self.fileObject.close()
+
+    def __enter__ (self) :
+        return self
+
+    def __exit__ (self, *args) :
+        self.close()
+
+
+def isIndex (fname) :
+    '''True if a file is a binary manifest.'''
+
+    with open(fname, 'rb') as f :
+        return f.read(len(magic)) == magic
+
+
+def manifestAlgorithm (fname) :
+    '''Return the name of the hash a manifest was made with. A text manifest
+    names it as the field the sums are in. Old ones with no header line
+    were always md5.'''
+
+    if isIndex(fname) :
+        with ManifestIndex(fname) as index :
+            return index.algorithm
+    with open(fname, 'rb') as f :
+        first = f.readline()
+    if first.startswith(utf8Bom) :
+        first = first[len(utf8Bom):]
+    if first.startswith('{') :
+        fields = json.loads(first).keys()
+    elif first.startswith('# ') :
+        fields = first[2:].rstrip('\r\n').split(', ')
+    else :
+        fields = first.rstrip('\r\n').split(',')
+    for field in fields :
+        if field in knownHashes :
+            return str(field)
+    return 'md5'
+
+
+def readManifest (fname) :
+    '''Yield (name, hex digest, size, mtime) records from a manifest in any
+    format, binary or text.'''
+
+    if isIndex(fname) :
+        with ManifestIndex(fname) as index :
+            for record in index :
+                yield record
+    else :
+        for name, digest, size, mtime in readLog(fname, ['name', manifestAlgorithm(fname), 'size', 'mtime']) :
+            yield name, digest, size, mtime
+
+
+def toIndex (textFile, indexFile) :
+    '''Convert a text manifest to a binary one.'''
+
+    writeIndex(indexFile, list(readManifest(textFile)), manifestAlgorithm(textFile))
+
+
+def fromIndex (indexFile, textFile, fmt='text') :
+    '''Convert a binary manifest to a text one in any of the logFormats.'''
+
+    with ManifestIndex(indexFile) as index :
+        # Only write the size and time if there are some to write
+        if any(size is not None or mtime is not None for name, digest, size, mtime in index) :
+            log = LogWriter(textFile, ['name', index.algorithm, 'size', 'mtime'], fmt)
+            for name, digest, size, mtime in index :
+                log.write(name, digest, '' if size is None else size, '' if mtime is None else mtime)
+        else :
+            log = LogWriter(textFile, ['name', index.algorithm], fmt)
+            for name, digest, size, mtime in index :
+                log.write(name, digest)
+        log.close()
+
+
+###############################################################################
+############################# Command Process ###############################
+###############################################################################
+
+# The argument handler
+def userArguments (args) :
+    '''Process incoming command arguments.'''
+
+    if not args.input or not os.path.isfile(args.input) :
+        sys.exit('\nERROR: Input manifest <' + str(args.input) + '> is not valid!')
+
+    # Look up a single name
+    if args.lookup :
+        with ManifestIndex(args.input) as index :
+            print index.lookup(args.lookup)
+        return
+
+    if not args.output :
+        sys.exit('\nERROR: No output manifest was specified')
+
+    # Convert whichever way is needed
+    if isIndex(args.input) :
+        fromIndex(args.input, args.output, args.format)
+    else :
+        toIndex(args.input, args.output)
+
+
+###############################################################################
+############################# Script Starts Here ##############################
+###############################################################################
+
+if __name__ == '__main__' :
+
+    # Give a welcome message
+    print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion
+
+    # Available choices
+    parser = argparse.ArgumentParser(description=scriptName)
+    parser.add_argument('-i', '--input', help='The manifest to read. If it is a text manifest it is converted to binary, if binary it is converted to text.')
+    parser.add_argument('-o', '--output', help='The manifest file to write.')
+    parser.add_argument('-f', '--format', choices=logFormats, default='text', help='The format of the text manifest to write. The default is text.')
+    parser.add_argument('-l', '--lookup', help='Look up a single name in a binary manifest and print its record.')
+
+    # Send the collected arguments to the handler
+    userArguments(parser.parse_args())
+
+    print '\t\tThank you, please come again!\n'
+
@@ -0,0 +1,338 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: ODT Index (odtIndex.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This script is part of the Data Miner package. Where peakOdt.py has to open
+# every document each time it searches, this one pulls the words out of each
+# document once and keeps them in an index (an SQLite file) that lists, for
+# each word, the documents it is in and where. After that a search is just a
+# few lookups in the index.
+#
+# Running with --update walks the search root and only reads documents that
+# are new or whose size or modification time has changed. Documents that
+# have gone are dropped from the index.
+#
+# A query is a list of words, all of which must be in a document. A phrase
+# in double quotes must be found as written. Put OR between two such lists
+# to find documents that match either one, for example:
+#
+#   odtIndex.py -r /data/odt '"annual report" 2016 OR budget'
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sys, re, zlib, zipfile, sqlite3, argparse, timeit
+from array import array
+from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+from datetime import timedelta
+from treeWalker import walk
+from peakOdt import textParts
+
+# Set some global vars here
+scriptName      = 'ODT Index'
+scriptVersion   = '0.01'
+startTime       = timeit.default_timer()
+
+# Where the index lives if no other place is given
+defaultIndexFile = os.path.join(os.path.expanduser('~'), '.cache', 'dataMiner', 'odtIndex.db')
+
+# Tags that end a word when the text is pulled out of the XML, all others
+# are dropped without a space as they can fall in the middle of a word
+breakTags       = re.compile(r'<(?:/?(?:text|w|table):(?:p|h|tab|s|line-break|br|cr|table-cell|list-item)\b)[^>]*>')
+otherTags       = re.compile(r'<[^>]*>')
+entities        = re.compile(r'&(#x[0-9a-fA-F]+|#[0-9]+|amp|lt|gt|quot|apos);')
+namedEntities   = {'amp' : u'&', 'lt' : u'<', 'gt' : u'>', 'quot' : u'"', 'apos' : u"'"}
+wordPattern     = re.compile(r'\w+', re.UNICODE)
+
+
+###############################################################################
+############################## Script Functions ###############################
+###############################################################################
+
+# Define functions
+
+def wordWrap (text, width) :
+    '''A word-wrap function that preserves existing line breaks
+        and most spaces in the text. Expects that existing line
+        breaks are linux style newlines (\n).'''
+
+    def func(line, word) :
+        nextword = word.split("\n", 1)[0]
+        n = len(line) - line.rfind('\n') - 1 + len(nextword)
+        if n >= width:
+            sep = "\n"
+        else:
+            sep = " "
+        return '%s%s%s' % (line, sep, word)
+    text = text.split(" ")
+    while len(text) > 1:
+        text[0] = func(text.pop(0), text[0])
+    return text[0]
+
+
+def terminal (msg) :
+    '''Send a message to the terminal with a little formating to make it
+    look nicer.'''
+
+    # Output the message and wrap it if it is over 60 chars long.
+    print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
+
+
+def entity (match) :
+    '''Turn one XML entity back into the character it stands for.'''
+
+    name = match.group(1)
+    if name.startswith('#x') :
+        return unichr(int(name[2:], 16))
+    if name.startswith('#') :
+        return unichr(int(name[1:]))
+    return namedEntities[name]
+
+
+def words (text) :
+    '''Split some text into lower case words.'''
+
+    return wordPattern.findall(text.lower())
+
+
+def extractWords (path) :
+    '''Pull the text out of a document and return (path, {word : [positions]})
+    or (path, None) if the document can't be read.'''
+
+    part = textParts.get(os.path.splitext(path)[1].lower().lstrip('.'), 'content.xml')
+    try :
+        with zipfile.ZipFile(path) as doc :
+            xml = doc.read(part)
+    except (zipfile.BadZipfile, zlib.error, KeyError, IOError, OSError, RuntimeError, EOFError) :
+        return path, None
+
+    text = otherTags.sub('', breakTags.sub(' ', xml)).decode('utf_8', 'replace')
+    text = entities.sub(entity, text)
+    positions = defaultdict(list)
+    for i, word in enumerate(words(text)) :
+        positions[word].append(i)
+    return path, dict(positions)
+
+
+def openIndex (indexFile) :
+    '''Open the index, creating it if needed.'''
+
+    if os.path.dirname(indexFile) and not os.path.isdir(os.path.dirname(indexFile)) :
+        os.makedirs(os.path.dirname(indexFile))
+    db = sqlite3.connect(indexFile)
+    db.text_factory = str
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime REAL)')
+    db.execute('''CREATE TABLE IF NOT EXISTS postings (term TEXT, doc INTEGER, positions BLOB,
+        PRIMARY KEY (term, doc)) WITHOUT ROWID''')
+    db.execute('CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc)')
+    return db
+
+
+def update (db, searchRoot, fileType, jobs=None) :
+    '''Bring the index up to date with the documents under the search root.
+    Returns the number of documents (re)read and dropped.'''
+
+    include = ['*.' + t for t in fileType] + ['*.' + t.upper() for t in fileType]
+    searchRoot = os.path.abspath(searchRoot)
+    known = dict((path, (size, mtime)) for path, size, mtime in
+        db.execute('SELECT path, size, mtime FROM docs WHERE substr(path, 1, ?) = ?',
+            (len(searchRoot) + 1, os.path.join(searchRoot, ''))))
+
+    # Find what is new or has changed
+    changed = []
+    stats = {}
+    for entry in walk(searchRoot, include=include) :
+        try :
+            st = entry.stat()
+        except OSError :
+            continue
+        stats[entry.path] = (st.st_size, st.st_mtime)
+        if known.pop(entry.path, None) != stats[entry.path] :
+            changed.append(entry.path)
+
+    # Anything left in known has gone
+    for path in known :
+        dropDoc(db, path)
+
+    jobs = int(jobs or cpu_count())
+    pool = Pool(jobs) if jobs > 1 else None
+    results = pool.imap(extractWords, changed, 16) if pool else (extractWords(p) for p in changed)
+    try :
+        for count, (path, positions) in enumerate(results) :
+            dropDoc(db, path)
+            size, mtime = stats[path]
+            doc = db.execute('INSERT INTO docs (path, size, mtime) VALUES (?, ?, ?)', (path, size, mtime)).lastrowid
+            if positions :
+                db.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                    ((word.encode('utf_8'), doc, sqlite3.Binary(array('I', p).tostring())) for word, p in positions.iteritems()))
+            if count % 1000 == 999 :
+                db.commit()
+    finally :
+        if pool :
+            pool.terminate()
+            pool.join()
+    db.commit()
+
+    return len(changed), len(known)
+
+
+def dropDoc (db, path) :
+    '''Take a document out of the index.'''
+
+    row = db.execute('SELECT id FROM docs WHERE path = ?', (path,)).fetchone()
+    if row :
+        db.execute('DELETE FROM postings WHERE doc = ?', row)
+        db.execute('DELETE FROM docs WHERE id = ?', row)
+
+
+def parseQuery (query) :
+    '''Turn a query into a list of alternatives, each a list of phrases,
+    each phrase a list of words.'''
+
+    alternatives = [[]]
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query.decode('utf_8', 'replace')) :
+        if word == 'OR' :
+            alternatives.append([])
+            continue
+        phraseWords = words(phrase or word)
+        if phraseWords :
+            alternatives[-1].append(phraseWords)
+    return [a for a in alternatives if a]
+
+
+def postings (db, word) :
+    '''Return {doc : positions} for a word.'''
+
+    return dict((doc, blob) for doc, blob in
+        db.execute('SELECT doc, positions FROM postings WHERE term = ?', (word.encode('utf_8'),)))
+
+
+def findPhrase (db, phrase) :
+    '''Return the set of docs that have all the words of a phrase, one after
+    the other.'''
+
+    lists = [postings(db, word) for word in phrase]
+    docs = set(lists[0])
+    for p in lists[1:] :
+        docs &= set(p)
+    if len(phrase) == 1 :
+        return docs
+
+    found = set()
+    for doc in docs :
+        starts = set(array('I', str(lists[0][doc])))
+        for offset, p in enumerate(lists[1:], 1) :
+            starts &= set(i - offset for i in array('I', str(p[doc])))
+            if not starts :
+                break
+        if starts :
+            found.add(doc)
+    return found
+
+
+def query (db, queryText) :
+    '''Run a query and return the matching paths in order.'''
+
+    docs = set()
+    for alternative in parseQuery(queryText) :
+        match = None
+        for phrase in alternative :
+            found = findPhrase(db, phrase)
+            match = found if match is None else match & found
+            if not match :
+                break
+        docs |= match or set()
+
+    paths = [db.execute('SELECT path FROM docs WHERE id = ?', (doc,)).fetchone()[0] for doc in docs]
+    return sorted(paths)
+
+
+###############################################################################
+############################# Command Process ###############################
+###############################################################################
+
+# The argument handler
+def userArguments (args) :
+    '''Process incoming command arguments.'''
+
+    db = openIndex(args.index)
+
+    if args.update :
+        if not args.search_root or not os.path.isdir(args.search_root) :
+            sys.exit('\nERROR: Search root <' + str(args.search_root) + '> is not valid!')
+        fileType = args.file_type.lower().split()
+        for t in fileType :
+            if t not in textParts :
+                sys.exit('\nERROR: Unknown document type: ' + t)
+        read, dropped = update(db, args.search_root, fileType, args.jobs)
+        if not args.quiet :
+            terminal('\nDocuments read: ' + str(read) + ' / Documents dropped: ' + str(dropped))
+
+    if args.query :
+        paths = query(db, ' '.join(args.query))
+        for path in paths :
+            print path
+        if not args.quiet :
+            terminal('\nDocuments found: ' + str(len(paths)))
+
+    db.close()
+
+
+###############################################################################
+############################# Script Starts Here ##############################
+###############################################################################
+
+if __name__ == '__main__' :
+
+    # Available choices
+    parser = argparse.ArgumentParser(description=scriptName)
+    parser.add_argument('query', nargs='*', help='What to search for. Words must all be found, "a phrase" in quotes must be found as written and OR between two lists finds either one.')
+    parser.add_argument('-r', '--search_root', help='The folder of documents to index.')
+    parser.add_argument('-u', '--update', action='store_true', help='This switch will bring the index up to date with the documents under the search root before searching.')
+    parser.add_argument('-x', '--index', default=defaultIndexFile, help='The index file to use. The default is ' + defaultIndexFile + '.')
+    parser.add_argument('-y', '--file_type', default='odt docx', help='The types of document to index. The default is "odt docx".')
+    parser.add_argument('-j', '--jobs', type=int, help='The number of documents to read at the same time when updating. The default is one for each CPU.')
+    parser.add_argument('-q', '--quiet', action='store_true', help='This switch will only output the matching paths.')
+    args = parser.parse_args()
+
+    # Give a welcome message
+    if not args.quiet :
+        print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion + '\n'
+
+    # Send the collected arguments to the handler
+    userArguments(args)
+
+    ###########################################################################
+    ######################### Close out the session ###########################
+    ###########################################################################
+
+    # In case there are any Canadians using this, politely say good bye
+    if not args.quiet :
+        timeTotal = round(timeit.default_timer() - startTime, 2)
+        print '\n\t\tTotal process time: ' + str(timedelta(seconds = timeTotal)).split('.')[0] + '\n'
+        print '\t\tThank you, please come again!\n'
+
@@ -0,0 +1,233 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Peak ODT (peakOdt.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This script is part of the Data Miner package. It searches the text of
+# OpenDocument (odt, ods, odp) and Office Open XML (docx) files under a folder
+# and lists the ones that have a match. It does the same job as the old
+# peakOdt.sh script but without starting an unzip and a grep for every file.
+# Only the part of each document that holds the text is decompressed
+# (content.xml or word/document.xml) and that stops as soon as the document
+# is known to match. The documents are searched by a pool of processes.
+#
+# Like the shell script, the search is done on the raw XML, so a phrase that
+# is split up by formatting in the document may not be found.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sys, re, zlib, zipfile, argparse, timeit
+from multiprocessing import Pool, cpu_count
+from datetime import timedelta
+from treeWalker import walk
+
+# Set some global vars here
+scriptName      = 'Peak ODT'
+scriptVersion   = '0.01'
+startTime       = timeit.default_timer()
+
+# The part of each kind of document that holds its text
+textParts       = {'odt' : 'content.xml', 'ods' : 'content.xml', 'odp' : 'content.xml',
+                    'docx' : 'word/document.xml'}
+# How much to read at a time and how much to keep from the last read so a
+# match that runs across two reads is still found
+readSize        = 65536
+overlap         = 1024
+
+
+###############################################################################
+############################## Script Functions ###############################
+###############################################################################
+
+# Define functions
+
+def wordWrap (text, width) :
+    '''A word-wrap function that preserves existing line breaks
+        and most spaces in the text. Expects that existing line
+        breaks are linux style newlines (\n).'''
+
+    def func(line, word) :
+        nextword = word.split("\n", 1)[0]
+        n = len(line) - line.rfind('\n') - 1 + len(nextword)
+        if n >= width:
+            sep = "\n"
+        else:
+            sep = " "
+        return '%s%s%s' % (line, sep, word)
+    text = text.split(" ")
+    while len(text) > 1:
+        text[0] = func(text.pop(0), text[0])
+    return text[0]
+
+
+def terminal (msg) :
+    '''Send a message to the terminal with a little formating to make it
+    look nicer.'''
+
+    # Output the message and wrap it if it is over 60 chars long.
+    print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
+
+
+def compileTerms (terms, regex=False, ignoreCase=False) :
+    '''Turn the search terms into a list of compiled patterns.'''
+
+    flags = re.IGNORECASE if ignoreCase else 0
+    if regex :
+        return [re.compile(t, flags) for t in terms]
+    return [re.compile(re.escape(t), flags) for t in terms]
+
+
+def searchDoc (args) :
+    '''Look for the patterns in one document. If matchAll is set every one
+    of the patterns must be found, otherwise any one will do. Returns the
+    path if it matched, None if not or if the document can't be read.'''
+
+    path, patterns, matchAll = args
+    part = textParts.get(os.path.splitext(path)[1].lower().lstrip('.'), 'content.xml')
+    left = set(range(len(patterns)))
+    try :
+        with zipfile.ZipFile(path) as doc :
+            stream = doc.open(part)
+            tail = ''
+            while True :
+                chunk = stream.read(readSize)
+                if not chunk :
+                    return None
+                text = tail + chunk
+                for i in list(left) :
+                    if patterns[i].search(text) :
+                        left.discard(i)
+                        if not matchAll or not left :
+                            return path
+                tail = text[-overlap:]
+    except (zipfile.BadZipfile, zlib.error, KeyError, IOError, OSError, RuntimeError, EOFError) :
+        # Recovered files are often broken, just pass them by
+        return None
+
+
+def search (searchRoot, terms, fileType, regex=False, ignoreCase=False, matchAll=False, jobs=None) :
+    '''Search every document of the given types under the search root and
+    print the path of each one that matches, in the order they are found
+    in the walk.'''
+
+    patterns = compileTerms(terms, regex, ignoreCase)
+    include = ['*.' + t for t in fileType] + ['*.' + t.upper() for t in fileType]
+    docs = (entry.path for entry in walk(searchRoot, include=include))
+    work = ((path, patterns, matchAll) for path in docs)
+    found = 0
+
+    jobs = int(jobs or cpu_count())
+    if jobs < 2 :
+        results = (searchDoc(w) for w in work)
+        pool = None
+    else :
+        pool = Pool(jobs)
+        results = pool.imap(searchDoc, work, 32)
+
+    try :
+        for path in results :
+            if path :
+                found +=1
+                print path
+                sys.stdout.flush()
+    finally :
+        if pool :
+            pool.terminate()
+            pool.join()
+
+    return found
+
+
+###############################################################################
+############################# Command Process ###############################
+###############################################################################
+
+# The argument handler
+def userArguments (args) :
+    '''Process incoming command arguments.'''
+
+    # Check the root folder we will search under
+    if args.search_root :
+        searchRoot = args.search_root
+        if not os.path.isdir(searchRoot) :
+            sys.exit('\nERROR: Search root <' + searchRoot + '> is not valid!')
+    else :
+        sys.exit('\nERROR: No search root was specified!')
+
+    if not args.terms :
+        sys.exit('\nERROR: No search terms were specified')
+
+    fileType = args.file_type.lower().split()
+    for t in fileType :
+        if t not in textParts :
+            sys.exit('\nERROR: Unknown document type: ' + t)
+
+    # Make sure a bad regular expression is caught here
+    try :
+        compileTerms(args.terms, args.regex)
+    except re.error as e :
+        sys.exit('\nERROR: Bad regular expression: ' + str(e))
+
+    # With all our paramters in place we can call the main function
+    found = search(searchRoot, args.terms, fileType, args.regex, args.ignore_case, args.all, args.jobs)
+    if not args.quiet :
+        terminal('\nDocuments found: ' + str(found))
+
+
+###############################################################################
+############################# Script Starts Here ##############################
+###############################################################################
+
+if __name__ == '__main__' :
+
+    # Available choices
+    parser = argparse.ArgumentParser(description=scriptName)
+    parser.add_argument('terms', nargs='*', help='The words or phrases to search for. A document matches if it has any of them.')
+    parser.add_argument('-r', '--search_root', help='The folder to search under.')
+    parser.add_argument('-y', '--file_type', default='odt docx', help='The types of document to search. The default is "odt docx".')
+    parser.add_argument('-e', '--regex', action='store_true', help='This switch will treat the terms as regular expressions.')
+    parser.add_argument('-i', '--ignore_case', action='store_true', help='This switch will make the search ignore case.')
+    parser.add_argument('-a', '--all', action='store_true', help='This switch will only list documents that have all of the terms.')
+    parser.add_argument('-j', '--jobs', type=int, help='The number of documents to search at the same time. The default is one for each CPU.')
+    parser.add_argument('-q', '--quiet', action='store_true', help='This switch will only output the matching paths, which is handy for passing on to other commands.')
+    args = parser.parse_args()
+
+    # Give a welcome message
+    if not args.quiet :
+        print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion + '\n'
+
+    # Send the collected arguments to the handler
+    userArguments(args)
+
+    ###########################################################################
+    ######################### Close out the session ###########################
+    ###########################################################################
+
+    # In case there are any Canadians using this, politely say good bye
+    if not args.quiet :
+        timeTotal = round(timeit.default_timer() - startTime, 2)
+        print '\n\t\tTotal process time: ' + str(timedelta(seconds = timeTotal)).split('.')[0] + '\n'
+        print '\t\tThank you, please come again!\n'
+
@@ -1,5 +1,9 @@
 #!/bin/bash
 
+# This is now just a wrapper around peakOdt.py, which does the search without
+# running unzip and grep for every file. Use peakOdt.py directly for more
+# than one term, regular expressions or other document types.
+
 # Set some hard coded vars here
 SEARCHROOT=/media/dennis/Data/recovered/files-by-type/odt/
 
@@ -8,15 +12,4 @@ if [ $# -ne 1 ]; then
 	exit 1
 fi
 
-for f in $(find $SEARCHROOT -name '*.odt'); do
-
-#for file in $(ls *.odt); do
-
-#    echo "Looking in: $f"
-
-	unzip -ca "$f" content.xml | grep -ql "$1"
-	if [ $? -eq 0 ]; then
-		echo "$f"
-	fi
-
-done
+exec python "$(dirname "$0")/peakOdt.py" -q -y odt -r "$SEARCHROOT" "$1"
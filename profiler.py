@@ -0,0 +1,239 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Profiler (profiler.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It keeps track of how long
+# each phase of the work takes so it can be seen if a slow run is held up
+# by the file system, the disk or the CPU. The phases are:
+#
+#   scandir     - Listing a folder.
+#   stat        - Getting the size and times of a file.
+#   filter      - Deciding if a file is wanted, this can include a stat.
+#   hash        - Taking the sum of a file.
+#   copy        - Copying a file, with its sum if one is taken on the way.
+#   move        - Moving a file.
+#   mkdir       - Making a folder.
+#   log         - Writing a line to a log, journal or check sum file.
+#
+# The other modules wrap each of these in a phase() block. Nothing is kept
+# unless a Profile has been started or a hook added, in which case each one
+# is passed the phase, the time it took and the bytes it handled. A Profile
+# adds up the times, counts and bytes of each phase along with a histogram
+# of the times, and can run cProfile as well.
+#
+# Times are per call, so with a number of threads at work the times of a
+# phase can add up to more than the run took. Sums taken in a pool of
+# processes are not seen.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, timeit, threading
+
+phases          = ['scandir', 'stat', 'filter', 'hash', 'copy', 'move', 'mkdir', 'log']
+
+# The functions each phase is passed to, and if any are
+hooks           = []
+active          = False
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+class NullTimer (object) :
+    '''What phase() hands back when nothing is being kept, it does nothing
+    and is False so callers can skip work only needed for profiling.'''
+
+    def __enter__ (self) :
+        return self
+
+    def __exit__ (self, *args) :
+        return False
+
+    def __nonzero__ (self) :
+        return False
+
+    __bool__ = __nonzero__
+
+nullTimer = NullTimer()
+
+
+class Timer (object) :
+    '''Times one pass through a phase and passes it to the hooks. The bytes
+    handled can be set on it before the block ends.'''
+
+    __slots__ = ('name', 'nbytes', 'start')
+
+    def __init__ (self, name, nbytes=0) :
+
+        self.name       = name
+        self.nbytes     = nbytes
+
+    def __enter__ (self) :
+        self.start = timeit.default_timer()
+        return self
+
+    def __exit__ (self, *args) :
+        seconds = timeit.default_timer() - self.start
+        for hook in hooks :
+            hook(self.name, seconds, self.nbytes or 0)
+        return False
+
+
+def phase (name, nbytes=0) :
+    '''Return a timer to wrap a phase of the work in.'''
+
+    if not active :
+        return nullTimer
+    return Timer(name, nbytes)
+
+
+def addHook (hook) :
+    '''Pass each phase to hook(name, seconds, nbytes) from now on.'''
+
+    global active
+    hooks.append(hook)
+    active = True
+
+
+def removeHook (hook) :
+    '''Stop passing phases to a hook.'''
+
+    global active
+    if hook in hooks :
+        hooks.remove(hook)
+    active = bool(hooks)
+
+
+def bucket (seconds) :
+    '''The histogram bucket for a time, they go up in powers of two
+    microseconds.'''
+
+    return int(seconds * 1000000).bit_length()
+
+
+class Profile (object) :
+    '''Add up the phases between start() and stop(). With cprofileFile set
+    cProfile is run too and its stats are written to that file.'''
+
+    def __init__ (self, cprofileFile=None) :
+
+        self.cprofileFile   = cprofileFile
+        self.calls          = {}
+        self.seconds        = {}
+        self.nbytes         = {}
+        self.histograms     = {}
+        self.lock           = threading.Lock()
+        self.cprofile       = None
+        self.wall           = 0.0
+        self.cpu            = 0.0
+        self.startWall      = None
+        self.startCpu       = None
+
+    def __call__ (self, name, seconds, nbytes) :
+        with self.lock :
+            if name not in self.calls :
+                self.calls[name] = 0
+                self.seconds[name] = 0.0
+                self.nbytes[name] = 0
+                self.histograms[name] = {}
+            self.calls[name] +=1
+            self.seconds[name] += seconds
+            self.nbytes[name] += nbytes
+            b = bucket(seconds)
+            self.histograms[name][b] = self.histograms[name].get(b, 0) + 1
+
+    def start (self) :
+        '''Start keeping track of the phases.'''
+
+        addHook(self)
+        if self.cprofileFile :
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.startWall = timeit.default_timer()
+        self.startCpu = sum(os.times()[:2])
+        return self
+
+    def stop (self) :
+        '''Stop keeping track and write out the cProfile stats if asked.'''
+
+        self.wall = timeit.default_timer() - self.startWall
+        self.cpu = sum(os.times()[:2]) - self.startCpu
+        if self.cprofile :
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofileFile)
+        removeHook(self)
+        return self
+
+    def percentile (self, name, fraction) :
+        '''The time, in seconds, that a fraction of the calls of a phase
+        took no longer than. This is only as good as the histogram, it is
+        the top of the bucket it falls in.'''
+
+        histogram = self.histograms[name]
+        wanted = fraction * self.calls[name]
+        seen = 0
+        for b in sorted(histogram) :
+            seen += histogram[b]
+            if seen >= wanted :
+                return (1 << b) / 1000000.0
+        return 0.0
+
+    def stats (self) :
+        '''Return a dict of what was found for each phase.'''
+
+        stats = {}
+        for name in self.calls :
+            seconds = self.seconds[name] or 1e-9
+            stats[name] = {
+                'calls' : self.calls[name],
+                'seconds' : self.seconds[name],
+                'bytes' : self.nbytes[name],
+                'filesPerSecond' : self.calls[name] / seconds,
+                'mbPerSecond' : self.nbytes[name] / 1048576.0 / seconds,
+                'p50' : self.percentile(name, 0.5),
+                'p90' : self.percentile(name, 0.9),
+                'p99' : self.percentile(name, 0.99),
+                'histogram' : dict(((1 << b) / 1000000.0, n) for b, n in self.histograms[name].items()),
+            }
+        return stats
+
+    def report (self) :
+        '''Return a table of the phases as text.'''
+
+        lines = ['%-8s %10s %9s %10s %9s %9s %9s %9s' % ('phase', 'calls', 'seconds', 'files/s', 'MB/s', 'p50 ms', 'p90 ms', 'p99 ms')]
+        stats = self.stats()
+        for name in phases + sorted(n for n in stats if n not in phases) :
+            if name not in stats :
+                continue
+            s = stats[name]
+            lines.append('%-8s %10d %9.3f %10.1f %9.2f %9.3f %9.3f %9.3f' % (name, s['calls'], s['seconds'],
+                s['filesPerSecond'], s['mbPerSecond'], s['p50'] * 1000, s['p90'] * 1000, s['p99'] * 1000))
+        lines.append('Wall time: %.3f s, CPU time: %.3f s (%d%%)' % (self.wall, self.cpu, 100 * self.cpu / (self.wall or 1e-9)))
+        if self.cprofileFile :
+            lines.append('cProfile stats written to: ' + self.cprofileFile)
+        return '\n'.join(lines)
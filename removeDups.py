@@ -34,10 +34,15 @@
 ###############################################################################
 
 # Import all needed Python libs
-import sys, os, hashlib, timeit, argparse
-from collections import defaultdict
+import sys, os, shutil, hashlib, binascii, tempfile, itertools, timeit, argparse
 from datetime import datetime
 from datetime import timedelta
+from hashEngine import cachedSum, hashRest, newHash, hashAlgorithms, fastHash
+from hashCache import HashCache, defaultCacheFile
+from treeWalker import walk
+from ioScheduler import schedule, ioOrders
+from digestStore import PathTable, DigestStore, sizeKey, idFormat
+from profiler import Profile, phase
 
 # Set some global vars here
 scriptName      = 'removeDups'
@@ -91,44 +96,112 @@ def terminal (msg) :
     print wordWrap(msg, 60).encode(sys.getfilesystemencoding())
 
 
-def chunk_reader(fobj, chunk_size=1024):
-    '''Generator that reads a file in chunks of bytes'''
+def fullSum (fname, hash=hashlib.sha1, chunkSize=None, mapSize=None) :
+    '''Return the digest of the entire contents of a file. Big files are
+    hashed from a memory map of them (see hashEngine.py).'''
 
-    while True:
-        chunk = fobj.read(chunk_size)
-        if not chunk:
-            return
-        yield chunk
+    with open(fname, 'rb', 0) as f :
+        return hashRest(f, hash(), chunkSize, mapSize)
 
 
-def remover(path, mode, hash=hashlib.sha1):
+def partialSum (fname, size, hash=hashlib.sha1, blockSize=4096) :
+    '''Return a digest of only the first and last block of a file. If the
+    file is no bigger than two blocks this covers the whole file and the
+    result is as good as a full sum.'''
+
+    hashobj = hash()
+    with open(fname, 'rb') as f :
+        hashobj.update(f.read(blockSize))
+        if size > blockSize * 2 :
+            f.seek(-blockSize, os.SEEK_END)
+            hashobj.update(f.read(blockSize))
+        elif size > blockSize :
+            hashobj.update(f.read())
+    return hashobj.hexdigest()
+
+
+def remover(path, mode, hash=hashlib.sha1, blockSize=4096, cache=None, ioOrder='walk', screen=None, chunkSize=None, mapSize=None, memoryLimit=1000000):
     '''This is the main part of the script where we generate the sums and
-    check for duplicates. There's a lot of vodo going on here and I do not
-    own most of this code.'''
+    check for duplicates. Rather than hashing every file in the tree, the
+    files are first grouped by size. Only sizes shared by more than one
+    file go on to have a partial sum taken of their first and last block
+    and only those that still collide get a full sum. The first file found
+    in the walk is always the one that is kept. Both kinds of sums are
+    kept in the hash cache if one is given.
+
+    The paths and the sizes and sums found are not held in memory but in a
+    PathTable and DigestStores (see digestStore.py) in a temp folder, which
+    keep no more than memoryLimit records in memory at a time. Each stage
+    goes through the groups of the one before it in order, so the files
+    of a stage can be read in the ioOrder given (see ioScheduler.py).
+
+    The partial sums can be taken with a different, faster, screen hash
+    than the full ones, such as one of the non cryptographic hashes in
+    hashEngine.py. Then small files get a full sum too, as the screen hash
+    alone is not trusted to decide what gets removed.'''
 
     dups = 0
-    hashes = {}
-    for dirpath, dirnames, filenames in os.walk(path):
-        for filename in filenames:
-            full_path = os.path.join(dirpath, filename)
-            hashobj = hash()
-            for chunk in chunk_reader(open(full_path, 'rb')):
-                hashobj.update(chunk)
-            file_id = (hashobj.digest(), os.path.getsize(full_path))
-            duplicate = hashes.get(file_id, None)
-            if duplicate :
+    screen = screen or hash
+    fullName = hash().name.lower()
+    partName = screen().name.lower() + '-partial-' + str(blockSize)
+
+    tempDir = tempfile.mkdtemp(prefix='removeDups_')
+    paths = PathTable(tempDir)
+    sizes = DigestStore('sizes', 8, tempDir, memoryLimit)
+    partials = DigestStore('partials', 8 + screen().digest_size, tempDir, memoryLimit)
+    fulls = DigestStore('fulls', 8 + hash().digest_size, tempDir, memoryLimit)
+
+    def sumAll (groups, sumFunc, name, store) :
+        '''Sum the files in the (size key, path numbers) groups in ioOrder
+        and add them to a store under their size and sum.'''
+
+        jobs = ((pathId, paths.get(pathId), key) for key, pathIds in groups for pathId in pathIds)
+        for pathId, f, key in schedule(jobs, ioOrder, key=lambda job : job[1]) :
+            size = idFormat.unpack(key[:8])[0]
+            try :
+                fsum = cachedSum(f, lambda f : sumFunc(f, size), name, cache)
+            except (IOError, OSError) :
+                continue
+            store.add(key[:8] + binascii.unhexlify(fsum), pathId)
+
+    def needsFull (key) :
+        '''Small files were fully covered by the partial sum, anything
+        bigger needs the whole file hashed to be sure.'''
+
+        return idFormat.unpack(key[:8])[0] > blockSize * 2 or screen is not hash
+
+    try :
+        # Stage 1: Group everything by size, a unique size can't be a duplicate
+        for entry in walk(path) :
+            try :
+                with phase('stat') :
+                    size = entry.stat().st_size
+                sizes.add(sizeKey(size), paths.add(entry.path))
+            except OSError :
+                pass
+
+        # Stage 2: Compare the first and last block
+        sumAll(sizes.groups(), lambda f, size : partialSum(f, size, screen, blockSize), partName, partials)
+        sizes.close()
+
+        # Stage 3: Hash the whole file where the partial sum isn't enough,
+        # the rest are already known to be the same
+        sumAll((g for g in partials.groups() if needsFull(g[0])), lambda f, size : fullSum(f, hash, chunkSize, mapSize), fullName, fulls)
+        same = itertools.chain((g for g in partials.groups() if not needsFull(g[0])), fulls.groups())
+
+        for key, pathIds in same :
+            for pathId in pathIds[1:] :
                 dups +=1
-#                    print full_path
                 sys.stdout.write('.')
                 sys.stdout.flush()
-#                print "\nDuplicate found: %s and %s" % (full_path, duplicate)
                 if mode != 'test' :
                     try:
-                        os.remove(full_path)
+                        os.remove(paths.get(pathId))
                     except OSError:
-                        pass                
-            else:
-                hashes[file_id] = full_path
+                        pass
+    finally :
+        paths.close()
+        shutil.rmtree(tempDir, ignore_errors=True)
 
     if mode == 'test' :
         if dups > 0 :
@@ -175,8 +248,24 @@ def userArguments (args) :
         sys.exit('\nERROR: Mode was not specified')
 
 
+    # Sums can be kept in a cache between runs
+    cache = None
+    if args.cache :
+        cache = HashCache(args.cache, args.cache_size)
+
+    # Time each phase of the work if asked, cProfile stats go to a file
+    profile = None
+    if args.profile :
+        profile = Profile(None if args.profile is True else args.profile).start()
+
     # With all our paramters in place we can call the main function
-    remover(sourcePath, mode)
+    remover(sourcePath, mode, newHash(args.algorithm), cache=cache, ioOrder=args.io_order, screen=newHash(args.screen), chunkSize=args.chunk_size, mapSize=args.mmap_size, memoryLimit=args.memory_limit)
+
+    if profile :
+        print '\n' + profile.stop().report()
+
+    if cache :
+        cache.close()
 
 
 ###############################################################################
@@ -198,6 +287,15 @@ if __name__ == '__main__' :
     parser = argparse.ArgumentParser()
     parser.add_argument('-s', '--source_path', help='The path to the data to be mined.')
     parser.add_argument('-m', '--mode', choices=modeType, help='There are two modes this script can run in. You can remove files or just test to see what files could be removed.')
+    parser.add_argument('-c', '--cache', nargs='?', const=defaultCacheFile, help='This switch will keep sums in a cache file so unchanged files are not read again on the next run. A cache file path can be given, the default is ' + defaultCacheFile + '.')
+    parser.add_argument('--cache_size', type=int, help='The most entries to keep in the cache file. The least recently used are dropped first. The default is no limit.')
+    parser.add_argument('-a', '--algorithm', choices=sorted(hashAlgorithms), default='sha1', help='The hash used to decide if files are the same. The default is sha1.')
+    parser.add_argument('--screen', choices=sorted(hashAlgorithms), default=fastHash, help='The hash used on the first and last block of each file to rule out files that are not the same before the full hash is taken. The default is ' + fastHash + ', the fastest one installed.')
+    parser.add_argument('--chunk_size', type=int, help='How many bytes of a file are read at a time when hashing. The default is 1048576.')
+    parser.add_argument('--mmap_size', type=int, help='Files this many bytes or bigger are memory mapped rather than read when hashing, which saves copying them. Use 0 to always read them. The default is 67108864 (64MB).')
+    parser.add_argument('-l', '--memory_limit', type=int, default=1000000, help='The most sizes or sums to hold in memory before they are sorted and written out to temp files. The paths found are always kept in a temp file. The default is 1000000.')
+    parser.add_argument('--profile', nargs='?', const=True, help='This switch will report the time taken by each phase of the work, such as listing folders, hashing and copying, with rates and times per file. If a file is given, cProfile stats are written to it too.')
+    parser.add_argument('--io_order', choices=ioOrders, default='walk', help='The order files are read in. Walk is the order they are found in, inode sorts them by inode number and physical by where they are on the disk. The last two are much faster on spinning disks. The default is walk.')
 
     # Send the collected arguments to the handler
     userArguments(parser.parse_args())
@@ -0,0 +1,160 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Scan Snapshot (scanSnapshot.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It keeps a snapshot of a walk
+# over a tree in an SQLite file: every folder with its modification time and
+# every file with its size, modification time and inode. On the next walk it
+# can tell which files are new or have changed since.
+#
+# It also saves reading folders that haven't changed. A folder's time only
+# changes when something is added to it, taken out or renamed, so if it is
+# the same as in the snapshot the folder is not listed again. Its files are
+# carried over from the snapshot and only its sub folders are looked at, one
+# stat each. The catch is that a file that is changed in place, without
+# anything being added to or taken from its folder, is not noticed. That is
+# fine for a tree that only grows, which is what this is for.
+#
+# The new snapshot is written to a separate file and only replaces the old
+# one when save() is called, so a run that doesn't finish leaves the old one
+# as it was.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sqlite3
+from treeWalker import Entry, scanDir
+from hashCache import statKey
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def openSnapshot (snapFile) :
+    '''Open a snapshot file, creating the tables if needed.'''
+
+    db = sqlite3.connect(snapFile)
+    db.text_factory = str
+    db.execute('PRAGMA synchronous=OFF')
+    db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+    db.execute('CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime INTEGER)')
+    db.execute('CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent)')
+    db.execute('''CREATE TABLE IF NOT EXISTS files (dir TEXT, name TEXT, size INTEGER, mtime INTEGER, ino INTEGER,
+        PRIMARY KEY (dir, name)) WITHOUT ROWID''')
+    return db
+
+
+class Snapshot (object) :
+    '''A snapshot of a walk of the tree under root. Pass scan() to walk() as
+    the function to list folders with, then use isNew() on the entries it
+    gives back. Call save() at the end to keep the new snapshot.'''
+
+    def __init__ (self, snapFile, root) :
+
+        self.snapFile   = snapFile
+        self.newFile    = snapFile + '.new'
+        self.root       = os.path.abspath(root)
+        if os.path.isfile(self.newFile) :
+            os.remove(self.newFile)
+        self.new        = openSnapshot(self.newFile)
+        self.new.execute('INSERT INTO meta VALUES (?, ?)', ('root', self.root))
+        self.old        = None
+        if os.path.isfile(snapFile) :
+            self.old = openSnapshot(snapFile)
+            row = self.old.execute('SELECT value FROM meta WHERE key = ?', ('root',)).fetchone()
+            if not row or row[0] != self.root :
+                # A snapshot of some other tree is no use to us
+                self.old.close()
+                self.old = None
+        if self.old :
+            self.new.execute('ATTACH DATABASE ? AS old', (snapFile,))
+        self.oldFiles   = {}
+        self.unchanged  = 0
+
+    def scan (self, path) :
+        '''List a folder for walk(). A folder that hasn't changed since the
+        snapshot is not read, its sub folders are taken from the snapshot.'''
+
+        absPath = os.path.abspath(path)
+        mtime = statKey(os.stat(path))[3]
+        parent = os.path.dirname(absPath) if absPath != self.root else None
+        self.new.execute('INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)', (absPath, parent, mtime))
+
+        old = None
+        if self.old :
+            old = self.old.execute('SELECT mtime FROM dirs WHERE path = ?', (absPath,)).fetchone()
+        if old and old[0] == mtime :
+            self.unchanged +=1
+            self.new.execute('INSERT INTO files SELECT * FROM old.files WHERE dir = ?', (absPath,))
+            return [Entry(path, os.path.basename(sub)) for sub, in
+                self.old.execute('SELECT path FROM dirs WHERE parent = ?', (absPath,))]
+
+        # Remember what the files were so isNew() can check them
+        self.oldFiles = {}
+        if self.old :
+            self.oldFiles = dict((name, tuple(rest)) for name, rest in
+                ((r[0], r[1:]) for r in self.old.execute('SELECT name, size, mtime, ino FROM files WHERE dir = ?', (absPath,))))
+        return scanDir(path)
+
+    def isNew (self, entry) :
+        '''True if a file entry is new or has changed since the snapshot. It
+        is added to the new snapshot either way. This must be called for an
+        entry before the walk moves on to the next folder.'''
+
+        dev, ino, size, mtime = statKey(entry.stat())
+        dirPath = os.path.dirname(os.path.abspath(entry.path))
+        self.new.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)', (dirPath, entry.name, size, mtime, ino))
+        return self.oldFiles.get(entry.name) != (size, mtime, ino)
+
+    def forget (self, path) :
+        '''Leave a file out of the new snapshot so it is seen as new next
+        time, for when it could not be dealt with this time. Its folder is
+        marked as changed too, or it would not be listed again.'''
+
+        absPath = os.path.abspath(path)
+        self.new.execute('DELETE FROM files WHERE dir = ? AND name = ?', (os.path.dirname(absPath), os.path.basename(absPath)))
+        self.new.execute('UPDATE dirs SET mtime = NULL WHERE path = ?', (os.path.dirname(absPath),))
+
+    def save (self) :
+        '''Replace the old snapshot with the new one.'''
+
+        self.new.commit()
+        if self.old :
+            self.new.execute('DETACH DATABASE old')
+            self.old.close()
+            self.old = None
+        self.new.close()
+        os.rename(self.newFile, self.snapFile)
+
+    def close (self) :
+        '''Throw the new snapshot away and keep the old one.'''
+
+        if self.old :
+            self.old.close()
+        self.new.close()
+        if os.path.isfile(self.newFile) :
+            os.remove(self.newFile)
+
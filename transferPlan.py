@@ -0,0 +1,221 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Transfer Plan (transferPlan.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. When fileSorter or dataMiner
+# are run in plan mode they work out where every file would go, the same as
+# in test mode, but write each source and target out to a plan file (csv)
+# rather than throwing them away. The plan can then be carried out later with
+# this script without walking and sorting through the source again.
+#
+# A plan can be split into shards so it can be carried out by a number of
+# runs at the same time, on the same machine or not. Shard n of m takes every
+# mth file starting from the nth. Each shard keeps a list of the files it has
+# finished next to the plan (plan.done.n) and any file in any of these lists
+# is skipped, so a run that was stopped can just be started again.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, sys, glob, errno, shutil, argparse, threading
+try :
+    import queue
+except ImportError :
+    import Queue as queue
+from collections import defaultdict
+from copyEngine import copyFile, strategies
+from logWriter import LogWriter, readLog
+from profiler import phase
+
+# Set some global vars here
+scriptName      = 'Transfer Plan'
+scriptVersion   = '0.01'
+
+planFields      = ['source', 'target']
+doneFields      = ['source']
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+def planWriter (planFile) :
+    '''Start a new plan file, this replaces any old one and its done lists.'''
+
+    for doneFile in glob.glob(planFile + '.done.*') :
+        os.remove(doneFile)
+    return LogWriter(planFile, planFields, 'csv')
+
+
+def readPlan (planFile, shard=0, shards=1) :
+    '''Yield the (source, target) pairs in one shard of a plan.'''
+
+    for i, (source, target) in enumerate(readLog(planFile, planFields)) :
+        if i % shards == shard :
+            yield source, target
+
+
+def loadDone (planFile) :
+    '''Return the set of files any shard of a plan has finished.'''
+
+    done = set()
+    for doneFile in glob.glob(planFile + '.done.*') :
+        for (source,) in readLog(doneFile, doneFields) :
+            done.add(source)
+    return done
+
+
+def makeDirs (folder) :
+    '''Make a folder and any above it, another thread may beat us to it.'''
+
+    try :
+        with phase('mkdir') :
+            os.makedirs(folder)
+    except OSError as e :
+        if e.errno != errno.EEXIST :
+            raise
+
+
+def execute (planFile, mode, jobs=4, shard=0, shards=1) :
+    '''Carry out one shard of a plan, copying or moving each file to its
+    target with a number of worker threads (jobs). Files already done are
+    skipped. If a move was done but not recorded the source will be gone
+    and the target there, so that counts as done too. Returns a dict of the
+    counts of each copy strategy used, or of the mode for moves, plus
+    "skipped" and "failed".'''
+
+    doneFile = planFile + '.done.' + str(shard)
+    done = loadDone(planFile)
+    counts = defaultdict(int)
+    made = set()
+    lock = threading.Lock()
+    work = queue.Queue(max(1, int(jobs)) * 64)
+
+    with LogWriter(doneFile, doneFields, 'csv', append=True) as log :
+
+        def worker () :
+            '''Copy or move the files that come off the queue.'''
+
+            while True :
+                job = work.get()
+                if job is None :
+                    return
+                source, target = job
+                try :
+                    folder = os.path.dirname(target)
+                    if folder not in made :
+                        makeDirs(folder)
+                        made.add(folder)
+                    if mode == 'copy' :
+                        strategy = copyFile(source, target)
+                    else :
+                        with phase('move') :
+                            shutil.move(source, target)
+                        strategy = mode
+                except (IOError, OSError, shutil.Error) as e :
+                    with lock :
+                        counts['failed'] +=1
+                    sys.stderr.write('Could not ' + mode + ' file: ' + source + ' (' + str(e) + ')\n')
+                    continue
+                with lock :
+                    counts[strategy] +=1
+                    log.write(source)
+
+        workers = []
+        for i in range(max(1, int(jobs))) :
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            workers.append(thread)
+
+        for source, target in readPlan(planFile, shard, shards) :
+            if source in done or (mode == 'move' and not os.path.lexists(source) and os.path.lexists(target)) :
+                counts['skipped'] +=1
+                continue
+            work.put((source, target))
+
+        for thread in workers :
+            work.put(None)
+        for thread in workers :
+            thread.join()
+
+    return counts
+
+
+###############################################################################
+############################# Command Process ###############################
+###############################################################################
+
+# The argument handler
+def userArguments (args) :
+    '''Process incoming command arguments.'''
+
+    if not args.plan or not os.path.isfile(args.plan) :
+        sys.exit('\nERROR: Plan file <' + str(args.plan) + '> is not valid!')
+
+    if not args.mode :
+        sys.exit('\nERROR: Mode was not specified')
+
+    # The shard is given as n/m, counting from 0
+    shard, shards = 0, 1
+    if args.shard :
+        try :
+            shard, shards = [int(n) for n in args.shard.split('/')]
+        except ValueError :
+            sys.exit('\nERROR: Shard <' + args.shard + '> should be given as n/m')
+        if shards < 1 or not 0 <= shard < shards :
+            sys.exit('\nERROR: Shard <' + args.shard + '> is out of range')
+
+    counts = execute(args.plan, args.mode, args.jobs, shard, shards)
+
+    print '\n\t\tFiles done: ' + str(sum(counts[s] for s in counts if s not in ('skipped', 'failed')))
+    if counts['skipped'] :
+        print '\t\tFiles already done: ' + str(counts['skipped'])
+    if counts['failed'] :
+        print '\t\tFiles that failed: ' + str(counts['failed'])
+    if any(s in counts for s in strategies) :
+        print '\t\tCopied by: ' + ', '.join(s + ' ' + str(counts[s]) for s in strategies if s in counts)
+
+
+###############################################################################
+############################# Script Starts Here ##############################
+###############################################################################
+
+if __name__ == '__main__' :
+
+    # Give a welcome message
+    print '\n\t\tWelcome to ' + scriptName + ' ' + scriptVersion
+
+    # Available choices
+    parser = argparse.ArgumentParser(description=scriptName)
+    parser.add_argument('-p', '--plan', help='The plan file made by fileSorter or dataMiner in plan mode.')
+    parser.add_argument('-m', '--mode', choices=['copy', 'move'], help='Copy or move the files in the plan.')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='The number of files to copy or move at the same time. The default is 4.')
+    parser.add_argument('-n', '--shard', help='Only carry out one shard of the plan, given as n/m. For example 0/4, 1/4, 2/4 and 3/4 can be run at the same time to split the plan four ways.')
+
+    # Send the collected arguments to the handler
+    userArguments(parser.parse_args())
+
+    print '\t\tThank you, please come again!\n'
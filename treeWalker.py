@@ -0,0 +1,190 @@
+#!/usr/bin/python
+# -*- coding: utf_8 -*-
+
+# Name: Tree Walker (treeWalker.py)
+# By: Dennis Drescher (dennis.drescher.86@gmail.com)
+# Last edited: 18 Oct 2026
+
+#    Copyright 2026, Dennis Drescher
+#    All rights reserved.
+#
+#    This library is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation; either version 2.1 of License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    Lesser General Public License for more details.
+
+###############################################################################
+######################### Description/Documentation ###########################
+###############################################################################
+
+# This module is part of the Data Miner package. It walks a tree and hands
+# back an entry for each file it finds. It is built on scandir() which gets
+# the file type along with the name when it reads a folder and holds on to
+# the stat() results once they have been asked for. That means a script can
+# ask for the size, time or inode of a file as many times as it likes and it
+# only costs one system call, or none at all for the type. On network and
+# FUSE mounts that adds up.
+#
+# Python 3.5 and up has scandir() in os, for older versions the scandir
+# package from PyPI is used if it is there. Without either it falls back to
+# listdir() and lstat() which still only stats each file once.
+
+###############################################################################
+################################ Initialize ###################################
+###############################################################################
+
+# Import all needed Python libs
+import os, stat
+from fnmatch import fnmatch
+from profiler import phase
+try :
+    from os import scandir
+except ImportError :
+    try :
+        from scandir import scandir
+    except ImportError :
+        scandir = None
+
+# What to do with symbolic links. 'files' is how os.walk() works, linked
+# files are listed but linked folders are not gone into. 'follow' goes into
+# linked folders as well and 'skip' leaves out all links.
+linkPolicies = ['files', 'follow', 'skip']
+
+
+###############################################################################
+############################## Module Functions ###############################
+###############################################################################
+
+class Entry (object) :
+    '''A stand in for os.DirEntry when there is no scandir(). It has the
+    same methods and caches its stat() results the same way.'''
+
+    def __init__ (self, root, name) :
+
+        self.name       = name
+        self.path       = os.path.join(root, name)
+        self._lstat     = None
+        self._stat      = None
+
+    def stat (self, follow_symlinks=True) :
+        if self._lstat is None :
+            self._lstat = os.lstat(self.path)
+        if not follow_symlinks or not stat.S_ISLNK(self._lstat.st_mode) :
+            return self._lstat
+        if self._stat is None :
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def inode (self) :
+        return self.stat(False).st_ino
+
+    def is_symlink (self) :
+        return stat.S_ISLNK(self.stat(False).st_mode)
+
+    def is_dir (self, follow_symlinks=True) :
+        try :
+            return stat.S_ISDIR(self.stat(follow_symlinks).st_mode)
+        except OSError :
+            return False
+
+    def is_file (self, follow_symlinks=True) :
+        try :
+            return stat.S_ISREG(self.stat(follow_symlinks).st_mode)
+        except OSError :
+            return False
+
+
+def scanDir (path) :
+    '''Return the entries of a single folder.'''
+
+    if scandir :
+        it = scandir(path)
+        try :
+            return list(it)
+        finally :
+            if hasattr(it, 'close') :
+                it.close()
+    return [Entry(path, name) for name in os.listdir(path)]
+
+
+def matches (name, patterns) :
+    '''True if a name matches any of a list of glob patterns.'''
+
+    for pattern in patterns :
+        if fnmatch(name, pattern) :
+            return True
+    return False
+
+
+def walk (top, links='files', include=None, exclude=None, prune=None, onError=None, scan=scanDir) :
+    '''Walk a tree from the top down and yield an entry for each file found.
+    The files in a folder come before those in its sub folders, much the
+    same order as os.walk() gives. Entries can be asked for stat() as often
+    as needed, it is only done once.
+
+    include     - Glob patterns, only file names that match one are yielded.
+    exclude     - Glob patterns, file and folder names that match one are
+                  left out. An excluded folder is not gone into at all.
+    prune       - A function that is given each folder entry and returns
+                  True if that folder should not be gone into.
+    links       - One of linkPolicies, see above.
+    onError     - A function that is given the OSError when a folder can't
+                  be read. By default the folder is quietly skipped.
+    scan        - The function used to list a folder, scanDir() by default.'''
+
+    if links not in linkPolicies :
+        raise ValueError('Unknown link policy: ' + str(links))
+    follow = links == 'follow'
+    seen = set()
+    if follow :
+        st = os.stat(top)
+        seen.add((st.st_dev, st.st_ino))
+
+    stack = [top]
+    while stack :
+        try :
+            with phase('scandir') :
+                entries = scan(stack.pop())
+        except OSError as e :
+            if onError :
+                onError(e)
+            continue
+
+        subDirs = []
+        for entry in entries :
+            try :
+                if entry.is_symlink() and links == 'skip' :
+                    continue
+                if exclude and matches(entry.name, exclude) :
+                    continue
+                if entry.is_dir(follow_symlinks=follow) :
+                    if prune and prune(entry) :
+                        continue
+                    if follow :
+                        st = entry.stat()
+                        # Don't go round in circles
+                        if (st.st_dev, st.st_ino) in seen :
+                            continue
+                        seen.add((st.st_dev, st.st_ino))
+                    subDirs.append(entry.path)
+                    continue
+                if entry.is_dir() :
+                    # A linked folder we are not following
+                    continue
+            except OSError as e :
+                if onError :
+                    onError(e)
+                continue
+            if include and not matches(entry.name, include) :
+                continue
+            yield entry
+
+        # Reverse them so they come off the stack in the order found
+        subDirs.reverse()
+        stack.extend(subDirs)
+